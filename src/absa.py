@@ -0,0 +1,200 @@
+import argparse
+import sys
+import time
+
+import batch_engine
+import model_bundle
+import setting
+import utils
+import worker_pool
+
+
+# ==========================================
+# CLI BATCH (TANPA STREAMLIT)
+# ==========================================
+# Jalankan dari folder src:
+#   python -m absa batch ulasan.csv hasil.parquet --lang auto --workers 4
+# Output berisi kolom yang sama dengan tabel halaman Batch (.parquet atau .csv).
+
+
+def output_schema(columns):
+    """Skema Parquet tetap: Confidence float, kolom lain string."""
+    import pyarrow as pa
+
+    return pa.schema(
+        [(col, pa.float64() if col == "Confidence" else pa.string()) for col in columns]
+    )
+
+
+class ResultWriter:
+    """Menulis DataFrame hasil per chunk ke .parquet / .csv dengan kolom tetap."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self.rows = 0
+
+    def write(self, df):
+        df = df.reindex(columns=self.columns)
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = output_schema(self.columns)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, schema)
+            self._writer.write_table(
+                pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            )
+        else:
+            df.to_csv(
+                self.path,
+                mode="w" if self.rows == 0 else "a",
+                header=self.rows == 0,
+                index=False,
+            )
+        self.rows += len(df)
+
+    def close(self):
+        if self.rows == 0:
+            # Input kosong: tetap tulis file berisi header/skema saja
+            import pandas as pd
+
+            self.write(pd.DataFrame(columns=self.columns))
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run_batch(
+    input_path, output_path, lang="auto", chunk_rows=None, workers=None, log=None
+):
+    """
+    Analisis satu file CSV/Excel dan tulis hasilnya ke `output_path`.
+    Hanya kolom teks yang dibaca, per `chunk_rows` baris (default
+    setting.STREAM_CHUNK_ROWS); hasil tiap chunk langsung ditulis, tidak
+    ditumpuk di memori. `workers` > 1 = chunk dibagi ke beberapa proses
+    (lihat worker_pool).
+    Teks yang identik dalam satu chunk hanya dianalisis sekali.
+    Output: dict ringkasan (rows, seconds, per_language, deduplicated).
+    """
+    log = log or (lambda msg: print(msg, file=sys.stderr))
+
+    reader = utils.open_text_column(input_path, chunk_rows)
+    if reader is None:
+        raise SystemExit(f"Gagal membaca file: {input_path}")
+    if reader.text_col is None:
+        raise SystemExit(f"Tidak dapat menemukan kolom teks di {input_path}")
+    total_rows = reader.count_rows()
+
+    model_store = utils.load_all_models()
+    cache = utils.create_inference_cache()
+    columns = batch_engine.result_columns(setting.ASPECT_KEYWORDS)
+    writer = ResultWriter(output_path, columns)
+
+    per_language = {}
+    pipeline = {}
+    dedup = {}
+    start = time.perf_counter()
+
+    def report(done, total, lang_progress):
+        per_language.update(lang_progress)
+
+    if workers and workers > 1:
+        results = worker_pool.iter_pool_results(
+            setting.ASPECT_KEYWORDS,
+            reader,
+            model_store,
+            lang,
+            processes=workers,
+            total=total_rows,
+            progress_callback=report,
+            dedup=dedup,
+            # CLI masih single-thread di titik ini: model aman dibagi lewat fork
+            allow_fork=True,
+        )
+    else:
+        results = batch_engine.iter_stream_results(
+            setting.ASPECT_KEYWORDS,
+            reader,
+            model_store,
+            lang,
+            total=total_rows,
+            progress_callback=report,
+            cache=cache,
+            pipeline=pipeline,
+            dedup=dedup,
+        )
+
+    try:
+        for df_result in results:
+            writer.write(df_result)
+
+            done = writer.rows
+            elapsed = time.perf_counter() - start
+            split = ", ".join(
+                f"{row_lang}={p['done']} ({p['rows_per_sec']:.0f}/s)"
+                for row_lang, p in per_language.items()
+            )
+            log(
+                f"{done}/{total_rows} baris, {done / max(elapsed, 1e-9):.0f} baris/s "
+                f"[{split}] duplikat={dedup.get('deduplicated', 0)} "
+                f"{batch_engine.format_pipeline_stats(pipeline)}"
+            )
+    finally:
+        writer.close()
+
+    return {
+        "rows": writer.rows,
+        "seconds": time.perf_counter() - start,
+        "per_language": {k: p["done"] for k, p in per_language.items()},
+        "deduplicated": dedup.get("deduplicated", 0),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m absa", description="Analisis sentimen berbasis aspek (ABSA)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Analisis file CSV/Excel tanpa UI.")
+    batch.add_argument("input", help="File ulasan (.csv / .xlsx)")
+    batch.add_argument("output", help="File hasil (.parquet / .csv)")
+    batch.add_argument("--lang", choices=["auto", "id", "en"], default="auto")
+    batch.add_argument(
+        "--workers",
+        type=int,
+        default=setting.BATCH_PROCESSES,
+        help="Jumlah proses worker (thread per proses diatur otomatis)",
+    )
+    batch.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=None,
+        help=f"Baris per chunk (default {setting.STREAM_CHUNK_ROWS})",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        try:
+            summary = run_batch(
+                args.input, args.output, args.lang, args.chunk_rows, args.workers
+            )
+        except model_bundle.ModelBundleError as e:
+            raise SystemExit(f"Bundle model tidak valid: {e}")
+        except utils.ModelLoadError as e:
+            raise SystemExit(str(e))
+        print(
+            f"Selesai: {summary['rows']} baris dalam {summary['seconds']:.1f} s "
+            f"-> {args.output}"
+        )
+        print(f"Baris duplikat (tidak dianalisis ulang): {summary['deduplicated']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import setting
+import utils
+
+
+# ==========================================
+# BATCH ENGINE (CROSS-REVIEW DYNAMIC BATCHING)
+# ==========================================
+
+
+def build_result_row(text, lang, gl_lbl, gl_conf, aspects):
+    """Format satu baris hasil seperti tabel pada halaman Batch."""
+    res_row = {
+        "Original Text": text,
+        "Language": lang,
+        "Global Sentiment": gl_lbl,
+        "Confidence": gl_conf,
+        "Aspects JSON": str(aspects),
+    }
+    for asp, detail in aspects.items():
+        res_row[f"{asp}_Sentiment"] = detail["label"]
+    return res_row
+
+
+def result_columns(ASPECT_KEYWORDS):
+    """
+    Daftar kolom hasil lengkap (kolom dasar + `{aspek}_Sentiment` untuk semua
+    aspek di kamus), untuk output yang ditulis bertahap dengan skema tetap.
+    """
+    columns = [
+        "Original Text",
+        "Language",
+        "Global Sentiment",
+        "Confidence",
+        "Aspects JSON",
+    ]
+    for aspects in ASPECT_KEYWORDS.values():
+        for asp in aspects:
+            if f"{asp}_Sentiment" not in columns:
+                columns.append(f"{asp}_Sentiment")
+    return columns
+
+
+def score_plans(
+    plans, models_tuple, batch_size=None, stats=None, cache=None, server=None
+):
+    """
+    Mengumpulkan semua teks yang perlu di-score dari banyak review, lalu
+    mengirimnya ke model per bahasa (di-bucket per panjang token, maksimal
+    `batch_size` teks per forward pass).
+    Jika `server` (InferenceServer) diberikan, teks dikirim ke antrian server
+    (model, cache & statistik padding dikelola server).
+    Output: list probabilitas per plan (urutan sama dengan `plans`).
+    """
+    # Kelompokkan teks per bahasa, simpan posisi asalnya
+    queues = {}
+    for plan_idx, plan in enumerate(plans):
+        queue = queues.setdefault(plan["lang"], [])
+        for text_idx, text in enumerate(plan["score_texts"]):
+            queue.append((plan_idx, text_idx, text))
+
+    results = [
+        np.zeros(len(plan["score_texts"]), dtype=np.float32) for plan in plans
+    ]
+    if server is not None:
+        # Kirim semua bahasa dulu, baru tunggu hasilnya
+        futures = {
+            lang: server.submit([text for _, _, text in queue], lang)
+            for lang, queue in queues.items()
+        }
+    for lang, queue in queues.items():
+        if server is not None:
+            probs = futures[lang].result()
+        else:
+            model, tokenizer = utils.select_model(models_tuple, lang)
+            probs = utils.get_bert_probs(
+                [text for _, _, text in queue],
+                model,
+                tokenizer,
+                lang,
+                batch_size=batch_size,
+                stats=stats,
+                cache=cache,
+            )
+        for (plan_idx, text_idx, _), prob in zip(queue, probs):
+            results[plan_idx][text_idx] = prob
+
+    return results
+
+
+def partition_by_language(texts, lang="auto", stats=None):
+    """
+    Menentukan bahasa seluruh kolom sekaligus (deteksi jika "auto"), lalu
+    mengelompokkan index baris per bahasa.
+    Output: dict {lang: [index baris, ...]} (index urut naik di tiap bahasa).
+    """
+    if lang == "auto":
+        row_langs = utils.detect_languages(texts, stats=stats)
+    else:
+        row_langs = [lang] * len(texts)
+
+    partitions = {}
+    for idx, row_lang in enumerate(row_langs):
+        partitions.setdefault(row_lang, []).append(idx)
+    return partitions
+
+
+def _prepare_chunk(ASPECT_KEYWORDS, texts, chunk_idx, row_lang):
+    """Stage preprocessing untuk satu chunk: output (plans, detik kerja)."""
+    start = time.perf_counter()
+    compiled = utils.compile_keywords(ASPECT_KEYWORDS, row_lang)
+    plans = [
+        utils.prepare_review(ASPECT_KEYWORDS, texts[i], row_lang, compiled)
+        for i in chunk_idx
+    ]
+    return plans, time.perf_counter() - start
+
+
+def update_pipeline_stats(pipeline, pending, workers, busy, started):
+    """Isi dict `pipeline` dengan kedalaman antrian & utilisasi tiap stage."""
+    wall = max(time.perf_counter() - started, 1e-9)
+    ready = sum(future.done() for _, _, future in pending)
+    pipeline.update(
+        {
+            "preprocess_workers": workers,
+            "queue_size": setting.PIPELINE_QUEUE_SIZE,
+            "queue_ready": ready,
+            "queue_in_progress": len(pending) - ready,
+            "max_queue_ready": max(pipeline.get("max_queue_ready", 0), ready),
+            "preprocess_utilization": busy["preprocess"] / (wall * workers),
+            "inference_utilization": busy["inference"] / wall,
+            "inference_wait_seconds": busy["wait"],
+        }
+    )
+
+
+def iter_partition_results(
+    ASPECT_KEYWORDS,
+    texts,
+    partitions,
+    models_tuple,
+    batch_size=None,
+    chunk_rows=None,
+    stats=None,
+    cache=None,
+    pipeline=None,
+    server=None,
+):
+    """
+    Generator hasil analisis per partisi bahasa.
+    Semua baris satu bahasa diproses berurutan per chunk, sehingga satu model
+    menerima pekerjaan beruntun dalam batch besar (tidak berganti-ganti id/en).
+    Yield (lang, index_baris, rows) per chunk; pemanggil mengembalikan urutan
+    baris asli lewat index_baris.
+
+    Producer/consumer: pool thread preprocessing (setting.PREPROCESS_WORKERS)
+    menyiapkan chunk berikutnya ke antrian terbatas (setting.PIPELINE_QUEUE_SIZE)
+    selagi chunk saat ini di-score model, jadi kerja teks tumpang tindih dengan
+    forward pass (PyTorch/ONNX melepas GIL). `pipeline` (dict, opsional) diisi
+    kedalaman antrian dan utilisasi tiap stage.
+    """
+    chunk_rows = chunk_rows or setting.BATCH_CHUNK_ROWS
+
+    if not utils.models_ready(models_tuple):
+        for row_lang, indices in partitions.items():
+            rows = [
+                build_result_row(texts[i], "en", "Error", 0.0, {}) for i in indices
+            ]
+            yield row_lang, indices, rows
+        return
+
+    work = iter(
+        [
+            (row_lang, indices[start : start + chunk_rows])
+            for row_lang, indices in partitions.items()
+            for start in range(0, len(indices), chunk_rows)
+        ]
+    )
+    workers = setting.PREPROCESS_WORKERS
+    pipeline = {} if pipeline is None else pipeline
+    busy = {"preprocess": 0.0, "inference": 0.0, "wait": 0.0}
+    started = time.perf_counter()
+    pending = deque()
+    executor = ThreadPoolExecutor(workers, thread_name_prefix="absa-preprocess")
+
+    def fill_queue():
+        # Antrian terbatas: maksimal PIPELINE_QUEUE_SIZE chunk disiapkan di depan
+        while len(pending) < setting.PIPELINE_QUEUE_SIZE:
+            item = next(work, None)
+            if item is None:
+                return
+            row_lang, chunk_idx = item
+            future = executor.submit(
+                _prepare_chunk, ASPECT_KEYWORDS, texts, chunk_idx, row_lang
+            )
+            pending.append((row_lang, chunk_idx, future))
+
+    try:
+        fill_queue()
+        while pending:
+            row_lang, chunk_idx, future = pending.popleft()
+            wait_start = time.perf_counter()
+            plans, prep_seconds = future.result()
+            busy["wait"] += time.perf_counter() - wait_start
+            busy["preprocess"] += prep_seconds
+            fill_queue()
+
+            infer_start = time.perf_counter()
+            all_probs = score_plans(
+                plans, models_tuple, batch_size, stats, cache, server
+            )
+
+            rows = []
+            for i, plan, probs in zip(chunk_idx, plans, all_probs):
+                gl_lbl, gl_conf, aspects, _ = utils.aggregate_review(plan, probs)
+                rows.append(
+                    build_result_row(texts[i], row_lang, gl_lbl, gl_conf, aspects)
+                )
+            busy["inference"] += time.perf_counter() - infer_start
+            update_pipeline_stats(pipeline, pending, workers, busy, started)
+            yield row_lang, chunk_idx, rows
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def dedupe_texts(texts):
+    """
+    Mengelompokkan teks yang identik (setelah spasi di awal/akhir dibuang).
+    Output: (index baris pertama tiap teks unik, posisi unik untuk tiap baris).
+    """
+    first_index = {}
+    unique_idx = []
+    inverse = []
+    for i, text in enumerate(texts):
+        key = text.strip()
+        pos = first_index.get(key)
+        if pos is None:
+            pos = first_index[key] = len(unique_idx)
+            unique_idx.append(i)
+        inverse.append(pos)
+    return unique_idx, inverse
+
+
+def analyze_batch(
+    ASPECT_KEYWORDS,
+    texts,
+    models_tuple,
+    lang="auto",
+    batch_size=None,
+    chunk_rows=None,
+    progress_callback=None,
+    stats=None,
+    cache=None,
+    pipeline=None,
+    server=None,
+    dedup=None,
+):
+    """
+    Menjalankan ABSA untuk seluruh kolom teks (mis. df[text_col]).
+    Teks yang identik hanya dianalisis sekali lalu hasilnya disalin ke semua
+    baris duplikatnya. Bahasa dideteksi untuk seluruh kolom dulu, baris
+    dipartisi per bahasa, lalu hasilnya disusun kembali sesuai urutan baris asli.
+    `progress_callback(done, total, lang_progress)` dipanggil setiap satu chunk
+    selesai; `lang_progress` berisi {lang: {"done", "total", "rows_per_sec"}}.
+    `stats` (list, opsional) diisi statistik padding per batch.
+    `cache` (opsional) adalah cache hasil inference dari utils.create_inference_cache().
+    `pipeline` (dict, opsional) diisi kedalaman antrian & utilisasi stage.
+    `server` (opsional) adalah InferenceServer bersama (lihat score_plans).
+    `dedup` (dict, opsional) ditambah jumlah baris "rows", "unique", "deduplicated".
+    """
+    texts = [str(t) for t in texts]
+    total_items = len(texts)
+
+    unique_idx, inverse = dedupe_texts(texts)
+    unique_texts = [texts[i] for i in unique_idx]
+    multiplicity = np.bincount(inverse, minlength=len(unique_texts))
+    unique_results = [None] * len(unique_texts)
+    if dedup is not None:
+        for key, count in (
+            ("rows", total_items),
+            ("unique", len(unique_texts)),
+            ("deduplicated", total_items - len(unique_texts)),
+        ):
+            dedup[key] = dedup.get(key, 0) + count
+
+    # Progres dihitung dalam baris asli (termasuk duplikat)
+    partitions = partition_by_language(unique_texts, lang)
+    lang_progress = {
+        row_lang: {
+            "done": 0,
+            "total": int(multiplicity[indices].sum()),
+            "rows_per_sec": 0.0,
+        }
+        for row_lang, indices in partitions.items()
+    }
+    lang_seconds = dict.fromkeys(partitions, 0.0)
+
+    done = 0
+    chunk_start = time.perf_counter()
+    for row_lang, indices, rows in iter_partition_results(
+        ASPECT_KEYWORDS,
+        unique_texts,
+        partitions,
+        models_tuple,
+        batch_size,
+        chunk_rows,
+        stats,
+        cache,
+        pipeline,
+        server,
+    ):
+        for idx, res_row in zip(indices, rows):
+            unique_results[idx] = res_row
+
+        rows_done = int(multiplicity[indices].sum())
+        lang_seconds[row_lang] += time.perf_counter() - chunk_start
+        progress = lang_progress[row_lang]
+        progress["done"] += rows_done
+        progress["rows_per_sec"] = progress["done"] / max(
+            lang_seconds[row_lang], 1e-9
+        )
+        done += rows_done
+
+        if progress_callback:
+            progress_callback(done, total_items, lang_progress)
+        chunk_start = time.perf_counter()
+
+    # Sebarkan hasil teks unik ke setiap baris (Original Text tetap milik baris itu)
+    results = []
+    for text, pos in zip(texts, inverse):
+        res_row = unique_results[pos]
+        if res_row["Original Text"] != text:
+            res_row = {**res_row, "Original Text": text}
+        results.append(res_row)
+    return pd.DataFrame(results)
+
+
+def merge_lang_progress(base, lang_progress):
+    """
+    Menggabungkan progres per bahasa chunk yang sedang berjalan ke progres
+    kumulatif chunk-chunk sebelumnya (`base`, format sama dengan output).
+    """
+    merged = {}
+    langs = list(base) + [l for l in lang_progress if l not in base]
+    for row_lang in langs:
+        prev = base.get(row_lang, {"done": 0, "total": 0, "seconds": 0.0})
+        cur = lang_progress.get(
+            row_lang, {"done": 0, "total": 0, "rows_per_sec": 0.0}
+        )
+        seconds = prev["seconds"]
+        if cur["rows_per_sec"]:
+            seconds += cur["done"] / cur["rows_per_sec"]
+        done = prev["done"] + cur["done"]
+        merged[row_lang] = {
+            "done": done,
+            "total": prev["total"] + cur["total"],
+            "rows_per_sec": done / seconds if seconds else 0.0,
+            "seconds": seconds,
+        }
+    return merged
+
+
+def iter_stream_results(
+    ASPECT_KEYWORDS,
+    chunks,
+    models_tuple,
+    lang="auto",
+    total=None,
+    batch_size=None,
+    progress_callback=None,
+    stats=None,
+    cache=None,
+    pipeline=None,
+    server=None,
+    dedup=None,
+):
+    """
+    Menganalisis teks yang datang bertahap (mis. dari utils.TextColumnReader).
+    Tiap chunk dianalisis dengan analyze_batch lalu langsung di-yield sebagai
+    DataFrame, jadi memori puncak tidak bergantung pada ukuran file.
+    `progress_callback(done, total, lang_progress)` sama seperti analyze_batch,
+    tetapi kumulatif untuk seluruh stream (`total` boleh None).
+    """
+    base = {}
+    done_before = 0
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        latest = {}
+
+        def report(chunk_done, chunk_total, lang_progress):
+            latest.update(merge_lang_progress(base, lang_progress))
+            if progress_callback:
+                progress_callback(done_before + chunk_done, total, latest)
+
+        df_chunk = analyze_batch(
+            ASPECT_KEYWORDS,
+            chunk,
+            models_tuple,
+            lang,
+            batch_size=batch_size,
+            progress_callback=report,
+            stats=stats,
+            cache=cache,
+            pipeline=pipeline,
+            server=server,
+            dedup=dedup,
+        )
+        base = dict(latest)
+        done_before += len(chunk)
+        yield df_chunk
+
+
+def format_pipeline_stats(pipeline):
+    """Ringkasan satu baris dari dict `pipeline` untuk UI/log."""
+    if not pipeline:
+        return ""
+    return (
+        f"antrian siap {pipeline['queue_ready']}/{pipeline['queue_size']} "
+        f"(proses {pipeline['queue_in_progress']}), "
+        f"utilisasi preprocess {pipeline['preprocess_utilization']:.0%} "
+        f"x{pipeline['preprocess_workers']}, "
+        f"inference {pipeline['inference_utilization']:.0%}"
+    )
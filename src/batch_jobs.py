@@ -0,0 +1,426 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+import batch_engine
+import setting
+import utils
+import worker_pool
+
+
+# ==========================================
+# BACKGROUND BATCH JOB (CHECKPOINT & RESUME)
+# ==========================================
+# Satu job = satu file upload + pilihan bahasa + kamus aspek. Job berjalan di
+# thread terpisah (bukan thread script Streamlit), setiap chunk yang selesai
+# disimpan ke disk, sehingga job bisa dilanjutkan setelah crash/restart dan
+# halaman Batch cukup "attach" lalu polling progresnya.
+#
+# Struktur folder per job (setting.BATCH_JOB_DIR/<job_id>/):
+#   job.json            -> metadata (bahasa, kamus aspek, total baris, status)
+#   input.csv / .xlsx   -> salinan file upload
+#   chunk_000000.parquet ... -> hasil per chunk (checkpoint)
+#   progress.json       -> ringkasan chunk yang sudah selesai
+#
+# Job yang tidak berjalan dihapus setelah setting.BATCH_JOB_TTL_HOURS jam tanpa
+# pembaruan (lihat purge_expired_jobs).
+
+JOB_FILE = "job.json"
+PROGRESS_FILE = "progress.json"
+
+# Job yang sedang berjalan di proses ini: job_id -> BatchJobRunner
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def _write_json(path, data):
+    """Tulis JSON secara atomik (file lama tidak pernah setengah tertulis)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_bytes(uploaded_file):
+    """Isi file upload Streamlit / file object / path sebagai bytes."""
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, "rb") as f:
+            return f.read()
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def job_id_for(content, lang, ASPECT_KEYWORDS):
+    """
+    ID job deterministik dari isi file + bahasa + kamus aspek, sehingga upload
+    ulang file yang sama menyambung ke job lama (tidak mulai dari nol).
+    """
+    digest = hashlib.sha1(content)
+    digest.update(lang.encode("utf-8"))
+    digest.update(repr(utils.keywords_version(ASPECT_KEYWORDS)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class BatchJob:
+    """Akses ke state satu job di disk (metadata, checkpoint chunk, progres)."""
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        self.job_id = os.path.basename(job_dir)
+        self.meta = _read_json(os.path.join(job_dir, JOB_FILE))
+        if self.meta is None:
+            raise FileNotFoundError(f"Job tidak ditemukan: {job_dir}")
+
+    def reload(self):
+        """Baca ulang job.json (status bisa diubah oleh thread runner)."""
+        meta = _read_json(os.path.join(self.job_dir, JOB_FILE))
+        if meta is not None:
+            self.meta = meta
+
+    @property
+    def input_path(self):
+        return os.path.join(self.job_dir, self.meta["input_file"])
+
+    def chunk_path(self, index):
+        return os.path.join(self.job_dir, f"chunk_{index:06d}.parquet")
+
+    def completed_chunks(self):
+        """
+        Dict {index chunk (str): {"rows", "languages", "deduplicated"}} yang
+        sudah di-checkpoint.
+        """
+        progress = _read_json(os.path.join(self.job_dir, PROGRESS_FILE), {})
+        return progress.get("chunks", {})
+
+    def save_chunk(self, index, df_chunk, deduplicated=0):
+        """Simpan hasil satu chunk, lalu catat di progress.json (urutan ini penting)."""
+        path = self.chunk_path(index)
+        tmp_path = f"{path}.tmp"
+        df_chunk.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+        chunks = self.completed_chunks()
+        chunks[str(index)] = {
+            "rows": len(df_chunk),
+            "languages": df_chunk["Language"].value_counts().to_dict(),
+            "deduplicated": deduplicated,
+        }
+        _write_json(os.path.join(self.job_dir, PROGRESS_FILE), {"chunks": chunks})
+
+    def set_status(self, status, error=None):
+        # Baca ulang dulu agar perubahan dari thread lain (mis. owner) tidak hilang
+        self.reload()
+        self.meta["status"] = status
+        self.meta["error"] = error
+        self.meta["updated"] = time.time()
+        _write_json(os.path.join(self.job_dir, JOB_FILE), self.meta)
+
+    def status(self):
+        """
+        "running", "done", "failed", atau "interrupted" (status di disk masih
+        berjalan/pending tapi tidak ada thread yang mengerjakannya, mis. setelah
+        crash/restart -> bisa dilanjutkan dengan start_job()).
+        """
+        runner = get_runner(self.job_id)
+        if runner is not None and runner.is_alive():
+            return "running"
+        self.reload()
+        if self.meta["status"] in ("done", "failed"):
+            return self.meta["status"]
+        return "interrupted"
+
+    def progress(self):
+        """Progres gabungan: chunk yang sudah di-checkpoint + chunk yang berjalan."""
+        done = 0
+        deduplicated = 0
+        languages = {}
+        for summary in self.completed_chunks().values():
+            done += summary["rows"]
+            deduplicated += summary.get("deduplicated", 0)
+            for row_lang, count in summary["languages"].items():
+                languages[row_lang] = languages.get(row_lang, 0) + count
+
+        rows_per_sec = 0.0
+        lang_rows_per_sec = {}
+        pipeline = {}
+        runner = get_runner(self.job_id)
+        if runner is not None and runner.is_alive():
+            done += runner.live_done
+            for row_lang, count in runner.live_languages.items():
+                languages[row_lang] = languages.get(row_lang, 0) + count
+            rows_per_sec = runner.rows_per_sec()
+            lang_rows_per_sec = {
+                row_lang: progress["rows_per_sec"]
+                for row_lang, progress in runner.lang_throughput.items()
+            }
+            pipeline = dict(runner.pipeline)
+
+        return {
+            "done": done,
+            "total": self.meta["total_rows"],
+            "languages": languages,
+            "rows_per_sec": rows_per_sec,
+            "lang_rows_per_sec": lang_rows_per_sec,
+            "pipeline": pipeline,
+            "deduplicated": deduplicated,
+        }
+
+    def result(self):
+        """Gabungkan semua checkpoint chunk (urutan baris asli) jadi satu DataFrame."""
+        import pandas as pd
+
+        indices = sorted(int(i) for i in self.completed_chunks())
+        frames = [pd.read_parquet(self.chunk_path(i)) for i in indices]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+
+class BatchJobRunner(threading.Thread):
+    """Thread yang mengerjakan chunk-chunk job yang belum punya checkpoint."""
+
+    def __init__(self, job, models_tuple, cache=None, server=None):
+        super().__init__(name=f"batch-job-{job.job_id}", daemon=True)
+        self.job = job
+        self.models_tuple = models_tuple
+        self.cache = cache
+        # Job batch = kelas prioritas "batch": request Single didahulukan
+        self.server = server.client("batch", job.job_id) if server else None
+        self.stats = []
+        self.pipeline = {}
+        self.dedup = {}
+        self.live_done = 0
+        self.live_languages = {}
+        # Throughput per bahasa kumulatif run ini (format merge_lang_progress);
+        # lang_base = gabungan chunk yang sudah di-checkpoint
+        self.lang_base = {}
+        self.lang_throughput = {}
+        self.rows_processed = 0
+        self.started_at = None
+
+    def rows_per_sec(self):
+        if not self.started_at:
+            return 0.0
+        done = self.rows_processed + self.live_done
+        return done / max(time.perf_counter() - self.started_at, 1e-9)
+
+    def _report(self, done, total, lang_progress):
+        self.live_done = done
+        self.live_languages = {
+            row_lang: progress["done"] for row_lang, progress in lang_progress.items()
+        }
+        self.lang_throughput = batch_engine.merge_lang_progress(
+            self.lang_base, lang_progress
+        )
+
+    def _report_pool(self, done, total, lang_progress):
+        # Pool sudah menggabungkan progres per bahasa lintas chunk
+        self.lang_throughput = lang_progress
+
+    def _iter_results(self, chunks):
+        """DataFrame hasil per chunk (urutan sama), satu proses atau pool proses."""
+        job = self.job
+        processes = setting.BATCH_PROCESSES
+        if processes and processes > 1:
+            # Dipanggil dari thread server Streamlit (multi-thread): worker
+            # di-spawn dan memuat model sendiri, tidak pernah fork
+            yield from worker_pool.iter_pool_results(
+                job.meta["aspect_keywords"],
+                chunks,
+                self.models_tuple,
+                job.meta["lang"],
+                processes=processes,
+                progress_callback=self._report_pool,
+                stats=self.stats,
+                dedup=self.dedup,
+            )
+            return
+
+        for chunk in chunks:
+            yield batch_engine.analyze_batch(
+                job.meta["aspect_keywords"],
+                chunk,
+                self.models_tuple,
+                job.meta["lang"],
+                progress_callback=self._report,
+                stats=self.stats,
+                cache=self.cache,
+                pipeline=self.pipeline,
+                server=self.server,
+                dedup=self.dedup,
+            )
+
+    def run(self):
+        job = self.job
+        self.started_at = time.perf_counter()
+        job.set_status("running")
+        try:
+            reader = utils.open_text_column(job.input_path, job.meta["chunk_rows"])
+            if reader is None or reader.text_col is None:
+                raise ValueError("Kolom teks tidak dapat dibaca dari file job.")
+
+            completed = job.completed_chunks()
+            indices = deque()
+
+            def pending_chunks():
+                for index, chunk in enumerate(reader):
+                    if str(index) not in completed:
+                        indices.append(index)
+                        yield chunk
+
+            deduplicated = 0
+            for df_chunk in self._iter_results(pending_chunks()):
+                # Progres live di-reset sebelum checkpoint agar baris tidak
+                # terhitung dua kali oleh progress()
+                self.rows_processed += len(df_chunk)
+                self.live_done = 0
+                self.live_languages = {}
+                self.lang_base = self.lang_throughput
+                chunk_dedup = self.dedup.get("deduplicated", 0) - deduplicated
+                deduplicated += chunk_dedup
+                job.save_chunk(indices.popleft(), df_chunk, chunk_dedup)
+            job.set_status("done")
+        except Exception as e:
+            job.set_status("failed", error=str(e))
+
+
+def job_dir_for(job_id):
+    return os.path.join(setting.BATCH_JOB_DIR, job_id)
+
+
+def create_job(
+    uploaded_file,
+    lang,
+    ASPECT_KEYWORDS,
+    chunk_rows=None,
+    total_rows=None,
+    owner=None,
+):
+    """
+    Menyimpan file upload ke folder job dan menulis metadata-nya.
+    Jika job yang sama (file, bahasa, kamus) sudah ada, job lama yang dipakai
+    (dan berpindah ke `owner` yang meng-upload ulang).
+    `total_rows` (opsional): jumlah baris yang sudah dihitung pemanggil, agar
+    file tidak dibaca ulang hanya untuk menghitung baris.
+    `owner` (opsional): id sesi pemilik job (lihat list_jobs).
+    Output: job_id.
+    """
+    purge_expired_jobs()
+    content = _read_bytes(uploaded_file)
+    job_id = job_id_for(content, lang, ASPECT_KEYWORDS)
+    job_dir = job_dir_for(job_id)
+    if os.path.exists(os.path.join(job_dir, JOB_FILE)):
+        job = BatchJob(job_dir)
+        if owner is not None and job.meta.get("owner") != owner:
+            job.meta["owner"] = owner
+            _write_json(os.path.join(job_dir, JOB_FILE), job.meta)
+        return job_id
+
+    os.makedirs(job_dir, exist_ok=True)
+    name = str(getattr(uploaded_file, "name", uploaded_file))
+    input_file = "input.csv" if name.endswith(".csv") else "input.xlsx"
+    with open(os.path.join(job_dir, input_file), "wb") as f:
+        f.write(content)
+
+    chunk_rows = chunk_rows or setting.BATCH_JOB_CHUNK_ROWS
+    reader = utils.open_text_column(os.path.join(job_dir, input_file), chunk_rows)
+    if reader is None or reader.text_col is None:
+        raise ValueError("Tidak dapat menemukan kolom teks.")
+
+    _write_json(
+        os.path.join(job_dir, JOB_FILE),
+        {
+            "source_name": os.path.basename(name),
+            "input_file": input_file,
+            "lang": lang,
+            "aspect_keywords": ASPECT_KEYWORDS,
+            "chunk_rows": chunk_rows,
+            "total_rows": (
+                reader.count_rows() if total_rows is None else total_rows
+            ),
+            "status": "pending",
+            "error": None,
+            "owner": owner,
+            "created": time.time(),
+            "updated": time.time(),
+        },
+    )
+    return job_id
+
+
+def get_job(job_id):
+    """BatchJob untuk job_id, atau None jika tidak ada di disk."""
+    try:
+        return BatchJob(job_dir_for(job_id))
+    except FileNotFoundError:
+        return None
+
+
+def get_runner(job_id):
+    with _runners_lock:
+        return _runners.get(job_id)
+
+
+def start_job(job_id, models_tuple, cache=None, server=None):
+    """
+    Menjalankan (atau melanjutkan) job di background thread. Chunk yang sudah
+    punya checkpoint dilewati. Jika job sedang berjalan, tidak ada yang diubah.
+    `server` (opsional): InferenceServer bersama, agar job batch berbagi model
+    dengan sesi lain lewat antrian yang sama.
+    """
+    with _runners_lock:
+        runner = _runners.get(job_id)
+        if runner is not None and runner.is_alive():
+            return runner
+        job = get_job(job_id)
+        if job is None:
+            raise FileNotFoundError(f"Job tidak ditemukan: {job_id}")
+        runner = BatchJobRunner(job, models_tuple, cache, server)
+        _runners[job_id] = runner
+        runner.start()
+        return runner
+
+
+def list_jobs(owner=None):
+    """Semua job di disk (hanya milik `owner` jika diisi), terbaru dulu."""
+    if not os.path.isdir(setting.BATCH_JOB_DIR):
+        return []
+    jobs = []
+    for job_id in os.listdir(setting.BATCH_JOB_DIR):
+        job = get_job(job_id)
+        if job is not None and (owner is None or job.meta.get("owner") == owner):
+            jobs.append(job)
+    return sorted(jobs, key=lambda job: job.meta["created"], reverse=True)
+
+
+def purge_expired_jobs(now=None):
+    """
+    Menghapus folder job (salinan upload + checkpoint) yang tidak sedang
+    berjalan dan tidak diperbarui lebih dari setting.BATCH_JOB_TTL_HOURS jam.
+    Output: list job_id yang dihapus.
+    """
+    ttl_hours = setting.BATCH_JOB_TTL_HOURS
+    if ttl_hours is None:
+        return []
+    now = time.time() if now is None else now
+    removed = []
+    for job in list_jobs():
+        if job.status() == "running":
+            continue
+        if now - job.meta["updated"] > ttl_hours * 3600:
+            shutil.rmtree(job.job_dir, ignore_errors=True)
+            removed.append(job.job_id)
+    return removed
@@ -0,0 +1,101 @@
+import sys
+import time
+
+import utils
+
+
+# ==========================================
+# BENCHMARK DETEKSI BAHASA: KAMUS vs LANGDETECT
+# ==========================================
+# Jalankan: python src/benchmark_langdetect.py [file.csv|file.xlsx]
+# Tanpa argumen, dipakai SAMPLE_REVIEWS di bawah (diukur beberapa putaran agar
+# waktunya terukur). Kedua detektor selalu diukur pada teks unik yang sama:
+# detect_languages memoisasi per teks, jadi duplikat akan membuat
+# perbandingannya mengukur deduplikasi, bukan detektornya.
+
+SAMPLE_REVIEWS = [
+    "aplikasinya bagus tapi iklannya terlalu banyak",
+    "lagunya lengkap, sayangnya harga premium mahal banget",
+    "suaranya jernih dan bass mantap",
+    "sering crash pas buka playlist, tolong diperbaiki",
+    "gak bisa login dari kemarin",
+    "kualitas audio turun setelah update",
+    "mantap",
+    "the app is great but there are too many ads",
+    "sound quality is amazing, bass is punchy",
+    "keeps crashing when i open my playlist",
+    "premium is too expensive for students",
+    "the new ui is confusing and the search is slow",
+    "best music app ever",
+    "good",
+]
+SAMPLE_REPEAT = 50
+
+
+def load_texts(path):
+    """Membaca kolom teks dari file CSV/Excel dengan helper yang sama seperti halaman Batch."""
+    df = utils.load_uploaded_file(path)
+    if df is None:
+        raise SystemExit(f"Gagal membaca file: {path}")
+    text_col = utils.find_text_column(df)
+    if text_col is None:
+        raise SystemExit(f"Kolom teks tidak ditemukan di {path}")
+    return df[text_col].dropna().astype(str).tolist()
+
+
+def compare_language_detectors(texts, rounds=1):
+    """
+    Membandingkan utils.detect_languages (kamus + fallback) terhadap
+    langdetect murni (dianggap acuan) pada teks unik: tingkat kesepakatan,
+    porsi yang jatuh ke langdetect, dan waktu proses keduanya (`rounds` putaran).
+    """
+    texts = list(dict.fromkeys(str(t) for t in texts))
+    # Pemanasan: kamus, resource NLTK, dan profil langdetect dimuat sekali
+    utils.detect_languages(texts[:1])
+
+    stats = {}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fast = utils.detect_languages(texts, stats=stats)
+    fast_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        reference = [utils.detect_language_langdetect(t) for t in texts]
+    ref_elapsed = time.perf_counter() - start
+
+    disagreements = [
+        (text, ours, ref)
+        for text, ours, ref in zip(texts, fast, reference)
+        if ours != ref
+    ]
+    decided = stats.get("vocab", 0) + stats.get("langdetect", 0)
+    return {
+        "reviews": len(texts),
+        "agreement": 1 - len(disagreements) / len(texts),
+        "fallback_rate": stats.get("langdetect", 0) / decided if decided else 0.0,
+        "fast_seconds": fast_elapsed,
+        "langdetect_seconds": ref_elapsed,
+        "disagreements": disagreements,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        report = compare_language_detectors(load_texts(sys.argv[1]))
+    else:
+        report = compare_language_detectors(SAMPLE_REVIEWS, rounds=SAMPLE_REPEAT)
+
+    print("=" * 60)
+    print("DETEKSI BAHASA: KAMUS vs LANGDETECT")
+    print("=" * 60)
+    print(f"Review unik           : {report['reviews']}")
+    print(f"Kesepakatan           : {report['agreement']:.1%}")
+    print(f"Fallback ke langdetect: {report['fallback_rate']:.1%}")
+    print(
+        f"Waktu                 : {report['langdetect_seconds']:.2f} s -> "
+        f"{report['fast_seconds']:.2f} s "
+        f"({report['langdetect_seconds'] / max(report['fast_seconds'], 1e-9):.1f}x)"
+    )
+    for text, ours, ref in report["disagreements"][:20]:
+        print(f"  [{ours} vs {ref}] {text[:80]}")
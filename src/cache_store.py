@@ -0,0 +1,218 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# ==========================================
+# CACHE STORE (MEMORI LRU + DISK SQLITE OPSIONAL)
+# ==========================================
+
+
+class LRUCache:
+    """Cache di memori dengan batas jumlah entry (Least Recently Used), thread-safe."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                return default
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+class TTLCache(LRUCache):
+    """LRUCache yang entry-nya kedaluwarsa setelah `ttl` detik."""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if time.monotonic() >= expires:
+            with self.lock:
+                self.data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
+
+
+class SingleFlight:
+    """
+    Menggabungkan pemanggilan serentak dengan key yang sama: hanya satu yang
+    benar-benar menghitung, sisanya menunggu dan memakai hasil yang sama.
+    Hasil yang selesai disimpan di `cache` (mis. TTLCache) untuk pemanggilan
+    berikutnya; error tidak di-cache tetapi diteruskan ke semua yang menunggu.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.inflight = {}  # key -> Future milik pemanggil pertama
+        self.counts = {"computed": 0, "coalesced": 0, "cache_hits": 0}
+        self.lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self.lock:
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                self.counts["cache_hits"] += 1
+                return cached
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.inflight[key] = Future()
+                self.counts["computed"] += 1
+            else:
+                self.counts["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self.lock:
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            if self.cache is not None:
+                self.cache.set(key, result)
+            del self.inflight[key]
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+class SQLiteStore:
+    """
+    Tier persisten key-value di file SQLite. Penulisan di-commit per
+    `commit_every` entry (dan saat proses selesai) agar tidak fsync tiap set.
+    """
+
+    def __init__(self, path, commit_every=256):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.path = path
+        self.commit_every = commit_every
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value)"
+        )
+        atexit.register(self.flush)
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key, value):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.conn.commit()
+                self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                self.conn.commit()
+                self.pending = 0
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TieredCache:
+    """
+    Cache dua tingkat: LRU di memori, lalu (opsional) SQLite di disk.
+    Hit dari disk dipromosikan ke memori. Counter hit/miss tersedia di stats().
+    Key harus string agar bisa disimpan di SQLite; value None tidak di-cache.
+    """
+
+    def __init__(self, maxsize, path=None):
+        self.memory = LRUCache(maxsize)
+        self.disk = SQLiteStore(path) if path else None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            with self.lock:
+                self.hits += 1
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self.memory),
+            "memory_maxsize": self.memory.maxsize,
+        }
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+import setting
+import utils
+
+
+# ==========================================
+# HARNESS PERBANDINGAN FP32 vs QUANTIZED (INT8)
+# ==========================================
+# Jalankan: python src/compare_quantized.py
+
+# Set review tetap agar hasil perbandingan bisa diulang
+REVIEW_SET = [
+    ("aplikasinya bagus tapi iklannya terlalu banyak", "id"),
+    ("lagunya lengkap, sayangnya harga premium mahal banget", "id"),
+    ("suaranya jernih dan bass mantap", "id"),
+    ("sering crash pas buka playlist, tolong diperbaiki", "id"),
+    ("podcastnya seru tapi aplikasinya lemot", "id"),
+    ("iklan muncul terus padahal sudah premium", "id"),
+    ("ui baru jelek, susah cari lagu", "id"),
+    ("mantap, rekomendasi lagunya pas banget", "id"),
+    ("gak bisa login dari kemarin", "id"),
+    ("kualitas audio turun setelah update", "id"),
+    ("the app is great but there are too many ads", "en"),
+    ("sound quality is amazing, bass is punchy", "en"),
+    ("keeps crashing when i open my playlist", "en"),
+    ("premium is too expensive for students", "en"),
+    ("love the recommendations, discover weekly is spot on", "en"),
+    ("the new ui is confusing and the search is slow", "en"),
+    ("podcasts are good however the app drains my battery", "en"),
+    ("cannot log in since the last update", "en"),
+    ("lyrics feature is nice but offline mode is broken", "en"),
+    ("best music app ever", "en"),
+]
+
+
+def run_review_set(ASPECT_KEYWORDS, models_tuple, reviews):
+    """Menjalankan pipeline ABSA ke semua review, sekaligus mencatat latency."""
+    results = []
+    start = time.perf_counter()
+    for text, lang in reviews:
+        results.append(
+            utils.analyze_single_review_complete(
+                ASPECT_KEYWORDS, text, models_tuple, lang
+            )
+        )
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(reviews)
+
+
+def compare_model_modes(ASPECT_KEYWORDS, reviews, fp32_models, quantized_models):
+    """
+    Membandingkan hasil mode quantized terhadap fp32 (dianggap acuan):
+    kesamaan label Global Sentiment, kesamaan label per aspek, selisih
+    confidence, latency per review, dan ukuran model.
+    """
+    # Pemanasan tanpa diukur: setup sekali jalan (Sastrawi, NLTK, Preprocessor,
+    # AspectMatcher) dan warm-up model tidak dibebankan ke mode pertama
+    for models_tuple in (fp32_models, quantized_models):
+        run_review_set(ASPECT_KEYWORDS, models_tuple, reviews)
+
+    fp32_results, fp32_latency = run_review_set(ASPECT_KEYWORDS, fp32_models, reviews)
+    q_results, q_latency = run_review_set(ASPECT_KEYWORDS, quantized_models, reviews)
+
+    global_agree = 0
+    aspect_total = 0
+    aspect_agree = 0
+    conf_diffs = []
+    for fp32_res, q_res in zip(fp32_results, q_results):
+        fp32_label, fp32_conf, fp32_aspects, _ = fp32_res
+        q_label, q_conf, q_aspects, _ = q_res
+
+        global_agree += fp32_label == q_label
+        conf_diffs.append(abs(float(fp32_conf) - float(q_conf)))
+        for asp, detail in fp32_aspects.items():
+            aspect_total += 1
+            aspect_agree += (
+                asp in q_aspects and q_aspects[asp]["label"] == detail["label"]
+            )
+
+    return {
+        "reviews": len(reviews),
+        "global_agreement": global_agree / len(reviews),
+        "aspect_agreement": aspect_agree / aspect_total if aspect_total else 1.0,
+        "aspect_count": aspect_total,
+        "max_confidence_diff": max(conf_diffs),
+        "mean_confidence_diff": float(np.mean(conf_diffs)),
+        "fp32_latency_ms": fp32_latency * 1000,
+        "quantized_latency_ms": q_latency * 1000,
+        "fp32_size_mb": sum(utils.model_memory_mb(m) for m, _ in fp32_models),
+        "quantized_size_mb": sum(
+            utils.model_memory_mb(m) for m, _ in quantized_models
+        ),
+    }
+
+
+if __name__ == "__main__":
+    fp32 = utils.load_all_models(mode="fp32")
+    quantized = utils.load_all_models(mode="quantized")
+    report = compare_model_modes(
+        setting.ASPECT_KEYWORDS,
+        REVIEW_SET,
+        (fp32["en"], fp32["id"]),
+        (quantized["en"], quantized["id"]),
+    )
+
+    print("=" * 60)
+    print("FP32 vs QUANTIZED (INT8)")
+    print("=" * 60)
+    print(f"Review                : {report['reviews']}")
+    print(f"Global Sentiment sama : {report['global_agreement']:.1%}")
+    print(
+        f"Label aspek sama      : {report['aspect_agreement']:.1%} "
+        f"({report['aspect_count']} aspek)"
+    )
+    print(
+        f"Selisih confidence    : max {report['max_confidence_diff']:.4f}, "
+        f"rata-rata {report['mean_confidence_diff']:.4f}"
+    )
+    print(
+        f"Latency per review    : {report['fp32_latency_ms']:.1f} ms -> "
+        f"{report['quantized_latency_ms']:.1f} ms"
+    )
+    print(
+        f"Ukuran model          : {report['fp32_size_mb']:.1f} MB -> "
+        f"{report['quantized_size_mb']:.1f} MB"
+    )
@@ -0,0 +1,338 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import setting
+import utils
+from cache_store import LRUCache
+
+
+# ==========================================
+# INFERENCE SERVER (MICRO-BATCHING LINTAS SESI)
+# ==========================================
+# Semua sesi Streamlit (halaman Single & job Batch) mengirim teks ke satu
+# antrian. Satu thread dispatcher menggabungkan permintaan yang masuk dalam
+# jendela waktu singkat (setting.SERVER_MAX_WAIT_MS) menjadi micro-batch per
+# bahasa, menjalankan satu forward pass, lalu membagi hasilnya ke Future
+# masing-masing. Model tidak lagi diperebutkan banyak thread sekaligus.
+#
+# Prioritas: request "interactive" (halaman Single) selalu diambil lebih dulu
+# daripada "batch" (job Batch). Request besar dipecah menjadi potongan
+# setting.SERVER_SESSION_CAP_TEXTS teks, dan dalam satu micro-batch satu sesi
+# maksimal sebanyak itu (sisanya menunggu micro-batch berikutnya): job batch
+# memberi jalan di antara potongannya dan satu sesi tidak memonopoli.
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class InferenceRequest:
+    """Satu permintaan scoring: teks-teks satu review/chunk dalam satu bahasa."""
+
+    __slots__ = ("texts", "lang", "priority", "session", "future", "enqueued")
+
+    def __init__(self, texts, lang, priority="interactive", session=None):
+        self.texts = texts
+        self.lang = lang
+        self.priority = priority
+        self.session = session
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+def _gather(futures):
+    """Future gabungan: hasil semua `futures` disambung sesuai urutan."""
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] or combined.done():
+                return
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+        else:
+            combined.set_result(np.concatenate([f.result() for f in futures]))
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+class InferenceClient:
+    """Pembungkus server dengan kelas prioritas & id sesi yang tetap."""
+
+    def __init__(self, server, priority, session):
+        self.server = server
+        self.priority = priority
+        self.session = session
+
+    def submit(self, texts, lang):
+        return self.server.submit(texts, lang, self.priority, self.session)
+
+    def score(self, texts, lang):
+        return self.submit(texts, lang).result()
+
+
+class InferenceServer:
+    """
+    Antrian + dispatcher thread untuk get_bert_probs.
+    `submit(texts, lang)` mengembalikan Future berisi array probabilitas
+    POSITIVE (urutan sama dengan `texts`).
+    """
+
+    def __init__(
+        self,
+        models_tuple,
+        cache=None,
+        max_batch_texts=None,
+        max_wait_ms=None,
+        batch_size=None,
+    ):
+        self.models_tuple = models_tuple
+        self.cache = cache
+        self.max_batch_texts = max_batch_texts or setting.SERVER_MAX_BATCH_TEXTS
+        self.max_wait = (max_wait_ms or setting.SERVER_MAX_WAIT_MS) / 1000
+        self.batch_size = batch_size
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        # Statistik (dibatasi agar server yang hidup lama tidak membengkak)
+        self.padding = deque(maxlen=10_000)
+        # Padding per sesi/job (micro-batch dibagi proporsional jumlah teks)
+        self.session_padding = LRUCache(1_000)
+        self.waits = {priority: deque(maxlen=10_000) for priority in PRIORITIES}
+        self.counts = {"requests": 0, "micro_batches": 0, "texts": 0}
+        self.lock = threading.Lock()
+        self.closed = False
+        self.dispatcher = threading.Thread(
+            target=self._run, name="absa-inference-dispatcher", daemon=True
+        )
+        self.dispatcher.start()
+
+    def client(self, priority="interactive", session=None):
+        """InferenceClient untuk satu sesi/job (dipakai sebagai `server=`)."""
+        return InferenceClient(self, priority, session)
+
+    def _put(self, request):
+        self.queue.put((PRIORITIES[request.priority], next(self.sequence), request))
+
+    def submit(self, texts, lang, priority="interactive", session=None):
+        """
+        Masukkan teks ke antrian; output Future berisi array probabilitas.
+        Request dipecah menjadi potongan seukuran jatah satu sesi per
+        micro-batch (setting.SERVER_SESSION_CAP_TEXTS), sehingga request
+        interactive bisa menyela di antara potongannya dan sesi lain di kelas
+        yang sama bisa ikut di micro-batch yang sama.
+        """
+        texts = list(texts)
+        if not texts:
+            future = Future()
+            future.set_result(np.array([], dtype=np.float32))
+            return future
+        if self.closed:
+            raise RuntimeError("InferenceServer sudah ditutup.")
+        if lang not in utils.POSITIVE_CLASS_INDEX:
+            raise ValueError(f"Tidak ada model untuk bahasa '{lang}'")
+
+        piece = self.max_batch_texts
+        if session is not None:
+            piece = min(piece, setting.SERVER_SESSION_CAP_TEXTS)
+        requests = [
+            InferenceRequest(texts[start : start + piece], lang, priority, session)
+            for start in range(0, len(texts), piece)
+        ]
+        for request in requests:
+            self._put(request)
+        if len(requests) == 1:
+            return requests[0].future
+        return _gather([request.future for request in requests])
+
+    def score(self, texts, lang, priority="interactive", session=None):
+        """Versi blocking dari submit()."""
+        return self.submit(texts, lang, priority, session).result()
+
+    def _collect(self, first):
+        """
+        Kumpulkan permintaan sampai micro-batch penuh atau deadline lewat.
+        Micro-batch interactive tidak diisi request batch, dan tiap sesi
+        dibatasi setting.SERVER_SESSION_CAP_TEXTS teks; request yang ditunda
+        dikembalikan ke antrian dengan urutan aslinya.
+        """
+        batch = [first]
+        size = len(first.texts)
+        per_session = {first.session: size}
+        deferred = []
+        deadline = first.enqueued + self.max_wait
+        while size < self.max_batch_texts:
+            timeout = deadline - time.perf_counter()
+            try:
+                # Deadline lewat (dispatcher tadi sibuk): ambil yang sudah antre
+                item = (
+                    self.queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self.queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            priority, seq, request = item
+            if request is None:
+                deferred.append(item)
+                break
+            if priority > PRIORITIES[first.priority]:
+                # Request batch tidak ikut micro-batch interactive
+                deferred.append(item)
+                break
+            if size + len(request.texts) > self.max_batch_texts:
+                deferred.append(item)
+                break
+            session_size = per_session.get(request.session, 0) + len(request.texts)
+            if (
+                request.session is not None
+                and session_size > setting.SERVER_SESSION_CAP_TEXTS
+            ):
+                # Jatah sesi ini di micro-batch sudah habis
+                deferred.append(item)
+                continue
+            batch.append(request)
+            per_session[request.session] = session_size
+            size += len(request.texts)
+
+        for item in deferred:
+            self.queue.put(item)
+        return batch
+
+    @staticmethod
+    def _fail(requests, error):
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _run(self):
+        # Kegagalan apa pun dikembalikan ke Future request yang terdampak;
+        # dispatcher tidak boleh mati (Future lain akan menunggu selamanya)
+        while True:
+            _, _, first = self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            try:
+                batch = self._collect(first)
+                dispatched = time.perf_counter()
+                by_lang = {}
+                for request in batch:
+                    by_lang.setdefault(request.lang, []).append(request)
+                with self.lock:
+                    for request in batch:
+                        self.waits[request.priority].append(
+                            dispatched - request.enqueued
+                        )
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+            for lang, requests in by_lang.items():
+                try:
+                    self._execute(lang, requests)
+                except Exception as e:
+                    self._fail(requests, e)
+
+    def _execute(self, lang, requests):
+        texts = [text for request in requests for text in request.texts]
+        padding = []
+        model, tokenizer = utils.select_model(self.models_tuple, lang)
+        probs = utils.get_bert_probs(
+            texts,
+            model,
+            tokenizer,
+            lang,
+            batch_size=self.batch_size,
+            stats=padding,
+            cache=self.cache,
+        )
+        if probs is None or len(probs) != len(texts):
+            raise RuntimeError(f"Model '{lang}' tidak mengembalikan probabilitas")
+
+        summary = utils.summarize_padding(padding)
+        with self.lock:
+            self.padding.extend(padding)
+            per_session = {}
+            for request in requests:
+                if request.session is not None and summary["batches"]:
+                    count = per_session.get(request.session, 0)
+                    per_session[request.session] = count + len(request.texts)
+            for session, count in per_session.items():
+                share = count / len(texts)
+                totals = self.session_padding.get(session) or {
+                    "batches": 0,
+                    "real_tokens": 0.0,
+                    "padded_tokens": 0.0,
+                }
+                totals["batches"] += summary["batches"]
+                totals["real_tokens"] += share * summary["real_tokens"]
+                totals["padded_tokens"] += share * summary["padded_tokens"]
+                self.session_padding.set(session, totals)
+            self.counts["requests"] += len(requests)
+            self.counts["micro_batches"] += 1
+            self.counts["texts"] += len(texts)
+
+        offset = 0
+        for request in requests:
+            end = offset + len(request.texts)
+            request.future.set_result(probs[offset:end])
+            offset = end
+
+    def padding_for(self, session):
+        """
+        Padding waste milik satu sesi/job (format utils.summarize_padding).
+        Micro-batch berisi banyak sesi, jadi token tiap micro-batch dibagi ke
+        sesi-sesinya sesuai porsi jumlah teks.
+        """
+        with self.lock:
+            totals = dict(self.session_padding.get(session) or {})
+        real = round(totals.get("real_tokens", 0))
+        padded = round(totals.get("padded_tokens", 0))
+        return {
+            "batches": totals.get("batches", 0),
+            "real_tokens": real,
+            "padded_tokens": padded,
+            "waste": 1.0 - real / padded if padded else 0.0,
+        }
+
+    def stats(self):
+        """
+        Jumlah request/micro-batch, rata-rata ukuran batch, padding waste
+        (utils.summarize_padding, semua sesi), dan waktu tunggu antrian per
+        kelas prioritas ("interactive" / "batch").
+        """
+        with self.lock:
+            counts = dict(self.counts)
+            padding = utils.summarize_padding(self.padding)
+            waits = {
+                priority: np.array(values) * 1000
+                for priority, values in self.waits.items()
+            }
+        return {
+            **counts,
+            "queue_depth": self.queue.qsize(),
+            "mean_batch_texts": counts["texts"] / max(counts["micro_batches"], 1),
+            "padding": padding,
+            "wait_ms": {
+                priority: {
+                    "count": len(values),
+                    "mean": float(values.mean()) if len(values) else 0.0,
+                    "p95": float(np.percentile(values, 95)) if len(values) else 0.0,
+                }
+                for priority, values in waits.items()
+            },
+        }
+
+    def close(self):
+        self.closed = True
+        # Sentinel diurutkan paling belakang: request yang sudah antre tetap selesai
+        self.queue.put((len(PRIORITIES), next(self.sequence), None))
+        self.dispatcher.join()
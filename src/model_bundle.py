@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import sys
+
+
+# ==========================================
+# BUNDLE MODEL LOKAL (OFFLINE) + INTEGRITY CHECK
+# ==========================================
+# Struktur bundle:
+#   <bundle>/manifest.json
+#   <bundle>/<lang>/model.safetensors, config.json, tokenizer files...
+# manifest.json: {"languages": {"en": {"model_id": ..., "files": {nama: sha256}}}}
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ModelBundleError(RuntimeError):
+    """Bundle model lokal tidak lengkap / rusak."""
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(bundle_dir):
+    manifest_path = os.path.join(bundle_dir, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        raise ModelBundleError(f"Manifest tidak ditemukan: {manifest_path}")
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError as e:
+        raise ModelBundleError(f"Manifest tidak valid ({manifest_path}): {e}")
+
+
+def verify_bundle(bundle_dir, lang, check_hashes=True):
+    """
+    Memastikan folder model `lang` di bundle lengkap & checksum-nya cocok.
+    Return path folder model. Raise ModelBundleError dengan pesan jelas jika gagal.
+    """
+    entry = read_manifest(bundle_dir).get("languages", {}).get(lang)
+    if entry is None:
+        raise ModelBundleError(f"Bahasa '{lang}' tidak ada di manifest {bundle_dir}")
+
+    model_dir = os.path.join(bundle_dir, lang)
+    files = entry.get("files", {})
+    if not any(name.endswith(".safetensors") for name in files):
+        raise ModelBundleError(f"Bundle '{lang}' tidak berisi bobot .safetensors")
+
+    for name, expected in files.items():
+        path = os.path.join(model_dir, name)
+        if not os.path.isfile(path):
+            raise ModelBundleError(f"File bundle hilang: {path}")
+        if check_hashes and file_sha256(path) != expected:
+            raise ModelBundleError(f"Checksum tidak cocok (file rusak?): {path}")
+
+    return model_dir
+
+
+def build_bundle(model_paths, bundle_dir):
+    """
+    Membuat bundle dari model hub/folder (butuh jaringan sekali saja, mis. saat
+    build image Docker): simpan safetensors + tokenizer + manifest checksum.
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    manifest = {"languages": {}}
+    for lang, model_path in model_paths.items():
+        model_dir = os.path.join(bundle_dir, lang)
+        os.makedirs(model_dir, exist_ok=True)
+
+        AutoTokenizer.from_pretrained(model_path).save_pretrained(model_dir)
+        AutoModelForSequenceClassification.from_pretrained(model_path).save_pretrained(
+            model_dir, safe_serialization=True
+        )
+
+        manifest["languages"][lang] = {
+            "model_id": model_path,
+            "files": {
+                name: file_sha256(os.path.join(model_dir, name))
+                for name in sorted(os.listdir(model_dir))
+                if os.path.isfile(os.path.join(model_dir, name))
+            },
+        }
+
+    with open(os.path.join(bundle_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    # python src/model_bundle.py build models/bundle
+    # python src/model_bundle.py verify models/bundle
+    import setting
+
+    command, bundle_dir = sys.argv[1], sys.argv[2]
+    if command == "build":
+        build_bundle(setting.MODEL_PATHS, bundle_dir)
+        print(f"Bundle dibuat di {bundle_dir}")
+    elif command == "verify":
+        for lang in read_manifest(bundle_dir).get("languages", {}):
+            print(f"{lang}: OK ({verify_bundle(bundle_dir, lang)})")
+    else:
+        sys.exit(f"Perintah tidak dikenal: {command} (pakai 'build' atau 'verify')")
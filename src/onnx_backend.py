@@ -0,0 +1,134 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import onnxruntime as ort
+import setting
+import torch
+
+
+# ==========================================
+# ONNX RUNTIME BACKEND (CPU)
+# ==========================================
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrapper agar model HF bisa di-export: input posisional -> tensor logits."""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *args):
+        return self.model(**dict(zip(self.input_names, args))).logits
+
+
+class OnnxSequenceClassifier:
+    """
+    Model ONNX dengan interface yang sama seperti model HF di get_bert_probs:
+    `model(**inputs).logits`. Input/output berupa numpy array (framework "np").
+    """
+
+    framework = "np"
+    device = "cpu"
+
+    def __init__(self, onnx_path, name_or_path):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if setting.ONNX_NUM_THREADS:
+            options.intra_op_num_threads = setting.ONNX_NUM_THREADS
+
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.onnx_path = onnx_path
+        self.name_or_path = name_or_path
+        self.cache_id = f"{name_or_path}:onnx"
+
+    def __call__(self, **inputs):
+        feed = {
+            name: np.asarray(inputs[name], dtype=np.int64)
+            for name in self.input_names
+            if name in inputs
+        }
+        (logits,) = self.session.run(["logits"], feed)
+        return SimpleNamespace(logits=logits)
+
+
+def onnx_path_for(model_path):
+    """Lokasi file .onnx hasil export untuk sebuah model id/folder."""
+    name = model_path.strip("/").replace("/", "__")
+    return os.path.join(setting.ONNX_MODEL_DIR, f"{name}.onnx")
+
+
+def export_to_onnx(model, tokenizer, onnx_path):
+    """Export model PyTorch ke ONNX dengan dimensi batch & sequence dinamis."""
+    folder = os.path.dirname(onnx_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    dummy = tokenizer(["contoh ulasan aplikasi"], return_tensors="pt")
+    input_names = list(dummy.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    model.eval()
+    torch.onnx.export(
+        _LogitsOnly(model, input_names),
+        tuple(dummy[name] for name in input_names),
+        onnx_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+        do_constant_folding=True,
+    )
+
+
+def max_prob_difference(texts, torch_model, onnx_model, tokenizer):
+    """Selisih maksimum probabilitas softmax antara backend PyTorch dan ONNX."""
+    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+    with torch.inference_mode():
+        torch_probs = torch.softmax(torch_model(**inputs).logits, dim=1).numpy()
+
+    inputs_np = tokenizer(texts, return_tensors="np", padding=True, truncation=True)
+    onnx_probs = softmax(onnx_model(**inputs_np).logits)
+    return float(np.abs(torch_probs - onnx_probs).max())
+
+
+def softmax(logits):
+    """Softmax numpy per baris (pengganti F.softmax untuk output ONNX)."""
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_onnx_classifier(model_path, tokenizer):
+    """
+    Memuat model ONNX untuk `model_path`. Jika belum ada, model PyTorch di-export
+    dulu lalu hasilnya dicek harus sama (dalam toleransi) dengan PyTorch.
+    """
+    from transformers import AutoModelForSequenceClassification
+
+    onnx_path = onnx_path_for(model_path)
+    if os.path.exists(onnx_path):
+        return OnnxSequenceClassifier(onnx_path, model_path)
+
+    torch_model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    export_to_onnx(torch_model, tokenizer, onnx_path)
+    onnx_model = OnnxSequenceClassifier(onnx_path, model_path)
+
+    samples = [
+        "aplikasinya bagus tapi iklannya terlalu banyak",
+        "the sound quality is great but it keeps crashing",
+        "mantap",
+    ]
+    diff = max_prob_difference(samples, torch_model, onnx_model, tokenizer)
+    if diff > setting.ONNX_TOLERANCE:
+        os.remove(onnx_path)
+        raise RuntimeError(
+            f"Hasil ONNX untuk {model_path} berbeda {diff:.2e} dari PyTorch "
+            f"(toleransi {setting.ONNX_TOLERANCE:.0e})"
+        )
+    return onnx_model
@@ -1432,3 +1432,104 @@ NEGATION_WORDS = {
     "unavailable",
     "offline",
 }
+
+# ==========================================
+# KONFIGURASI INFERENCE ENGINE
+# ==========================================
+
+# Jumlah segmen per forward pass BERT pada mode Batch
+BATCH_SIZE = 64
+
+# Jumlah baris review yang diproses per chunk (preprocessing -> inference -> hasil)
+BATCH_CHUNK_ROWS = 512
+
+# Cache stemming Sastrawi per kata: jumlah entry di memori (LRU) dan
+# file SQLite opsional agar hasil stemming awet lintas sesi/restart (None = nonaktif)
+STEM_CACHE_SIZE = 100_000
+STEM_CACHE_PATH = None
+
+# Cache hasil inference per segmen (model, bahasa, teks) -> probabilitas POSITIVE.
+# Dipakai bersama oleh semua sesi Streamlit; SQLite opsional (None = hanya memori)
+INFERENCE_CACHE_SIZE = 200_000
+INFERENCE_CACHE_PATH = None
+
+# Device PyTorch: "auto" (GPU jika ada), "cpu", atau "cuda"
+DEVICE = "auto"
+
+# Jumlah thread intra-op PyTorch (None = default PyTorch / jumlah core)
+TORCH_NUM_THREADS = None
+
+# Backend inference: "torch" (PyTorch) atau "onnx" (ONNX Runtime, CPU)
+INFERENCE_BACKEND = "torch"
+
+# Folder hasil export ONNX, jumlah thread ONNX Runtime (None = default),
+# dan toleransi selisih probabilitas ONNX vs PyTorch saat export
+ONNX_MODEL_DIR = "models/onnx"
+ONNX_NUM_THREADS = None
+ONNX_TOLERANCE = 1e-4
+
+# Mode model PyTorch: "fp32" (default) atau "quantized" (dynamic int8 untuk
+# layer Linear; lebih hemat memori & cepat di CPU). Cek akurasinya dengan
+# `python src/compare_quantized.py`
+MODEL_MODE = "fp32"
+
+# Model per bahasa (Hugging Face hub id / folder lokal). Model dimuat saat
+# bahasa tersebut pertama kali dipakai, jadi tenant satu bahasa hanya memuat satu model
+MODEL_PATHS = {
+    "en": "Hamusssss12/spotify-absa-english-v2",
+    "id": "Hamusssss12/spotify-absa-indonesian-v2",
+}
+
+# Unload model yang tidak dipakai selama N detik (None = tidak pernah di-unload)
+MODEL_IDLE_TTL = None
+
+# Batas total memori bobot model dalam MB (None = tanpa batas); jika terlampaui,
+# model yang paling lama tidak dipakai di-unload
+MODEL_MEMORY_BUDGET_MB = None
+
+# Bundle model lokal/offline (hasil `python src/model_bundle.py build <folder>`).
+# Jika diisi, model dibaca dari folder ini, bukan dari Hugging Face hub.
+# MODEL_BUNDLE_VERIFY = cek checksum SHA-256 tiap file saat startup (load_all_models)
+MODEL_BUNDLE_DIR = None
+MODEL_BUNDLE_VERIFY = True
+
+# Deteksi bahasa berbasis kamus: minimal jumlah kata khas ID/EN yang ditemukan
+# dan selisih relatif minimal |id - en| / (id + en); di bawah itu -> langdetect
+LANG_DETECT_MIN_HITS = 2
+LANG_DETECT_MIN_MARGIN = 0.5
+
+# CLI batch (`python -m absa batch ...`): jumlah baris yang dibaca, dianalisis,
+# dan ditulis ke file output per langkah
+STREAM_CHUNK_ROWS = 20_000
+
+# Background job batch (halaman Batch): folder checkpoint per job dan jumlah
+# baris per chunk yang disimpan ke disk (job dilanjutkan dari chunk terakhir)
+BATCH_JOB_DIR = "batch_jobs"
+BATCH_JOB_CHUNK_ROWS = 2_000
+# Interval polling progres job di halaman Batch (detik)
+BATCH_JOB_POLL_SECONDS = 1.0
+# Job yang tidak berjalan dan tidak diperbarui selama ini (jam) dihapus beserta
+# salinan file upload & checkpoint-nya; None = simpan selamanya
+BATCH_JOB_TTL_HOURS = 24
+
+# Pipeline batch producer/consumer: jumlah thread preprocessing dan jumlah chunk
+# yang boleh disiapkan di depan stage inference (antrian terbatas)
+PREPROCESS_WORKERS = 2
+PIPELINE_QUEUE_SIZE = 4
+
+# Mode multi-proses untuk batch (opt-in): jumlah proses worker. None/1 = satu
+# proses. Thread intra-op per worker diatur otomatis (jumlah core / worker)
+BATCH_PROCESSES = None
+
+# Inference server bersama (halaman Single & job Batch): request dari semua sesi
+# digabung jadi micro-batch sampai SERVER_MAX_BATCH_TEXTS teks, atau sampai
+# request pertama sudah menunggu SERVER_MAX_WAIT_MS milidetik
+SERVER_MAX_BATCH_TEXTS = 256
+SERVER_MAX_WAIT_MS = 10
+# Jatah maksimal teks per sesi/job dalam satu micro-batch (fairness antar sesi)
+SERVER_SESSION_CAP_TEXTS = 64
+
+# Cache hasil analisis review tunggal (halaman Single): teks + bahasa + versi
+# kamus aspek yang sama dalam REVIEW_RESULT_TTL detik tidak dianalisis ulang
+REVIEW_RESULT_CACHE_SIZE = 10_000
+REVIEW_RESULT_TTL = 300
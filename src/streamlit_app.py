@@ -1,12 +1,16 @@
 import streamlit as st
-import pandas as pd
 import time
 import copy
 import utils  # Custom Module
+import batch_engine  # Custom Module
+import batch_jobs  # Custom Module
+import inference_server  # Custom Module
 import visualizer  # Custom Module
 import setting  # Custom Module
+import model_bundle  # Custom Module
 import base64
 import os
+import uuid
 
 # ==========================================
 # 0. ASSETS & ICONS SETUP (LOCAL FILES)
@@ -234,23 +238,36 @@ def initialize_ai_engine():
     return utils.load_all_models()
 
 
+@st.cache_resource
+def initialize_inference_cache():
+    # Satu cache untuk semua sesi (review yang sama tidak di-score ulang)
+    return utils.create_inference_cache()
+
+
+inference_cache = initialize_inference_cache()
+
+
+# Model per bahasa dimuat saat pertama kali dipakai (lazy), bukan saat startup
+try:
+    model_store = initialize_ai_engine()
+except model_bundle.ModelBundleError as e:
+    st.error(f"⚠️ Error Critical: Bundle model tidak valid. Pesan Error: {str(e)}")
+    st.info("Pastikan folder bundle berisi hasil `model_bundle.py build` yang lengkap.")
+    st.stop()
+
+
+@st.cache_resource
+def initialize_inference_server(_model_store):
+    # Satu antrian + dispatcher untuk semua sesi: request digabung jadi micro-batch
+    return inference_server.InferenceServer(_model_store, cache=inference_cache)
+
+
+server = initialize_inference_server(model_store)
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
 if "models_loaded" not in st.session_state:
-    with st.spinner("Sedang Memanaskan Mesin AI (Loading Models)..."):
-        dict_model = initialize_ai_engine()
-        models_en = dict_model["en"]
-        models_id = dict_model["id"]
-
-        if models_en is None or models_id is None:
-            st.error("Gagal memuat model. Pastikan folder 'models/' lengkap.")
-            st.stop()
-
-        st.session_state["models_en"] = models_en
-        st.session_state["models_id"] = models_id
-        st.session_state["models_loaded"] = True
+    st.session_state["models_loaded"] = True
     st.toast("Sistem AI Siap Digunakan!")
-else:
-    models_en = st.session_state["models_en"]
-    models_id = st.session_state["models_id"]
 
 
 # ==========================================
@@ -354,11 +371,26 @@ elif menu == "Analisis Teks (Single)":
 
     if analyze_btn and input_text:
         start_time = time.time()
-        global_sentiment, confidence, aspect_results, lang = (
-            utils.analyze_single_review_complete(
-                st.session_state["ASPECT_KEYWORDS"], input_text, (models_en, models_id)
-            )
-        )
+        with st.spinner("Menganalisis (model dimuat otomatis saat pertama dipakai)..."):
+            try:
+                global_sentiment, confidence, aspect_results, lang = (
+                    utils.analyze_review_coalesced(
+                        st.session_state["ASPECT_KEYWORDS"],
+                        input_text,
+                        model_store,
+                        cache=inference_cache,
+                        server=server.client(
+                            "interactive", st.session_state["session_id"]
+                        ),
+                    )
+                )
+            except (utils.ModelLoadError, model_bundle.ModelBundleError) as e:
+                # Model dimuat lazy (saat request pertama), jadi gagal muat
+                # dilaporkan di sini, bukan saat startup
+                st.error(
+                    f"⚠️ Error Critical: Gagal memuat model AI. Pesan Error: {str(e)}"
+                )
+                st.stop()
         end_time = time.time()
         print(f"Aspect result : {aspect_results}")
         st.divider()
@@ -437,7 +469,17 @@ elif menu == "Analisis Teks (Single)":
             for item in right_items:
                 st.markdown(render_card(item), unsafe_allow_html=True)
 
-        st.caption(f"Waktu Pemrosesan: {end_time - start_time:.4f} detik")
+        cache_stats = inference_cache.stats()
+        server_stats = server.stats()
+        st.caption(
+            f"Waktu Pemrosesan: {end_time - start_time:.4f} detik | "
+            f"Cache inference: {cache_stats['hits'] + cache_stats['disk_hits']} hit, "
+            f"{cache_stats['misses']} miss ({cache_stats['hit_rate']:.1%}) | "
+            f"Antrian server (p95): interactive "
+            f"{server_stats['wait_ms']['interactive']['p95']:.0f} ms, "
+            f"batch {server_stats['wait_ms']['batch']['p95']:.0f} ms, "
+            f"rata-rata {server_stats['mean_batch_texts']:.1f} teks/micro-batch"
+        )
 
     st.divider()
     render_subheader_with_image(
@@ -514,12 +556,24 @@ elif menu == "Analisis File (Batch)":
     uploaded_file = st.file_uploader("Drop file di sini", type=["csv", "xlsx"])
 
     if uploaded_file:
-        df = utils.load_uploaded_file(uploaded_file)
-        if df is not None:
-            text_col = utils.find_text_column(df)
+        # Hanya kolom teks yang dibaca, per chunk (tidak memuat seluruh file)
+        reader = utils.open_text_column(uploaded_file)
+        if reader is not None:
+            text_col = reader.text_col
             if text_col:
+                # Menghitung baris = membaca seluruh file; cukup sekali per upload
+                # (bukan di setiap rerun Streamlit)
+                upload_key = getattr(uploaded_file, "file_id", None) or (
+                    uploaded_file.name,
+                    uploaded_file.size,
+                )
+                cached = st.session_state.get("upload_row_count")
+                if cached is None or cached[0] != upload_key:
+                    cached = (upload_key, reader.count_rows())
+                    st.session_state["upload_row_count"] = cached
+                total_rows = cached[1]
 
-                st.success(f"File berhasil dimuat! **{len(df)}** baris.")
+                st.success(f"File berhasil dimuat! **{total_rows}** baris.")
 
                 st.markdown("##### Konfigurasi Bahasa")
 
@@ -540,42 +594,113 @@ elif menu == "Analisis File (Batch)":
                     lang = "auto"
 
                 if st.button("Jalankan Analisis AI (Batch)", type="primary"):
-                    progress_text = "Memproses ulasan..."
-                    my_bar = st.progress(0, text=progress_text)
-                    results = []
-                    df_to_process = df
-                    total_items = len(df_to_process)
-
-                    for idx, row in df_to_process.iterrows():
-                        text = str(row[text_col])
-                        gl_lbl, gl_conf, aspects, lang = (
-                            utils.analyze_single_review_complete(
-                                st.session_state["ASPECT_KEYWORDS"],
-                                text,
-                                (models_en, models_id),
-                                lang,
-                            )
-                        )
-                        res_row = {
-                            "Original Text": text,
-                            "Language": lang,
-                            "Global Sentiment": gl_lbl,
-                            "Confidence": gl_conf,
-                            "Aspects JSON": str(aspects),
-                        }
-                        for asp, detail in aspects.items():
-                            res_row[f"{asp}_Sentiment"] = detail["label"]
-                        results.append(res_row)
-                        my_bar.progress(
-                            int(((idx + 1) / total_items) * 100),
-                            text=f"Processing {idx+1}/{total_items}...",
-                        )
-
-                    my_bar.empty()
-                    st.session_state["batch_result"] = pd.DataFrame(results)
+                    # Dijalankan sebagai background job: progres tidak hilang
+                    # jika halaman ditinggal / koneksi putus, dan bisa dilanjutkan
+                    job_id = batch_jobs.create_job(
+                        uploaded_file,
+                        lang,
+                        st.session_state["ASPECT_KEYWORDS"],
+                        total_rows=total_rows,
+                        owner=st.session_state["session_id"],
+                    )
+                    batch_jobs.start_job(job_id, model_store, inference_cache, server)
+                    st.session_state["batch_job_id"] = job_id
+                    st.session_state.pop("batch_result", None)
             else:
                 st.error("Tidak dapat menemukan kolom teks.")
 
+    # Job sesi ini yang belum selesai: yang masih berjalan bisa dipantau, yang
+    # terhenti bisa dilanjutkan. Job dari sesi lama (mis. sebelum restart
+    # server) tersambung lagi dengan meng-upload ulang file yang sama.
+    # Job kedaluwarsa (setting.BATCH_JOB_TTL_HOURS) dibersihkan dulu.
+    batch_jobs.purge_expired_jobs()
+    unfinished = [
+        job
+        for job in batch_jobs.list_jobs(owner=st.session_state["session_id"])
+        if job.status() in ("running", "interrupted")
+        and job.job_id != st.session_state.get("batch_job_id")
+    ]
+    if unfinished:
+        with st.expander(f"Job batch belum selesai ({len(unfinished)})"):
+            for job in unfinished:
+                progress = job.progress()
+                c_info, c_btn = st.columns([4, 1])
+                c_info.write(
+                    f"**{job.meta['source_name']}** ({job.meta['lang']}): "
+                    f"{progress['done']}/{progress['total']} baris"
+                )
+                label = "Pantau" if job.status() == "running" else "Lanjutkan"
+                if c_btn.button(label, key=f"resume_{job.job_id}"):
+                    batch_jobs.start_job(
+                        job.job_id, model_store, inference_cache, server
+                    )
+                    st.session_state["batch_job_id"] = job.job_id
+                    st.session_state.pop("batch_result", None)
+                    st.rerun()
+
+    job_id = st.session_state.get("batch_job_id")
+    job = batch_jobs.get_job(job_id) if job_id else None
+    if job is not None:
+
+        def format_lang_split(progress):
+            parts = []
+            for row_lang, count in progress["languages"].items():
+                part = f"{row_lang.upper()} {count}"
+                rate = progress["lang_rows_per_sec"].get(row_lang)
+                if rate:
+                    part += f" ({rate:.0f}/s)"
+                parts.append(part)
+            return " | ".join(parts)
+
+        # Attach ke job: polling progres selama job berjalan di background
+        my_bar = st.progress(0, text="Memproses ulasan...")
+        while job.status() == "running":
+            progress = job.progress()
+            my_bar.progress(
+                int(progress["done"] / max(progress["total"], 1) * 100),
+                text=f"Processing {progress['done']}/{progress['total']}... "
+                f"{format_lang_split(progress)} "
+                f"({progress['rows_per_sec']:.0f} baris/s) | "
+                f"{batch_engine.format_pipeline_stats(progress['pipeline'])}",
+            )
+            time.sleep(setting.BATCH_JOB_POLL_SECONDS)
+        my_bar.empty()
+
+        status = job.status()
+        if status == "done":
+            st.session_state["batch_result"] = job.result()
+            del st.session_state["batch_job_id"]
+
+            final_progress = job.progress()
+            caption = (
+                f"Per bahasa: {format_lang_split(final_progress)} | "
+                f"{final_progress['deduplicated']} baris duplikat dilewati"
+            )
+            runner = batch_jobs.get_runner(job.job_id)
+            if runner is not None and runner.stats:
+                padding = utils.summarize_padding(runner.stats)
+            else:
+                # Job lewat InferenceServer: padding dicatat per sesi (job_id)
+                padding = server.padding_for(job.job_id)
+            if padding["batches"]:
+                caption += (
+                    f" | {padding['batches']} batch model, "
+                    f"padding waste {padding['waste']:.1%} "
+                    f"({padding['real_tokens']:,}/{padding['padded_tokens']:,} token)"
+                )
+            st.caption(
+                f"{caption} | cache inference hit rate "
+                f"{inference_cache.stats()['hit_rate']:.1%}"
+            )
+        elif status == "failed":
+            st.error(f"Job batch gagal: {job.meta['error']}")
+            del st.session_state["batch_job_id"]
+        else:
+            st.warning("Job batch terhenti sebelum selesai.")
+            if st.button("Lanjutkan Job", type="primary"):
+                batch_jobs.start_job(job.job_id, model_store, inference_cache, server)
+                st.rerun()
+
     if "batch_result" in st.session_state:
         df_res = st.session_state["batch_result"]
         st.divider()
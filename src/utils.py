@@ -1,41 +1,86 @@
-import streamlit as st
-import pandas as pd
 import numpy as np
 import re
-import pickle
+import copy
+import gc
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
 import setting
-import torch
-import nltk
-from io import BytesIO
-from langdetect import detect, LangDetectException
+import model_bundle
+from cache_store import SingleFlight, TieredCache, TTLCache
 
-# Library NLP & Deep Learning
-from nltk.corpus import stopwords
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch.nn.functional as F
+# Library NLP & Deep Learning (torch, transformers, nltk, Sastrawi, langdetect)
+# di-import saat pertama kali dipakai, bukan saat `import utils`, agar startup
+# & rerun Streamlit tetap cepat. Lihat test/test_import_time.py.
 
 
 # ==========================================
 # 1. SETUP ENVIRONMENT & RESOURCE LOADING
 # ==========================================
 
-# Definisi Device (GPU/CPU) untuk PyTorch
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-# Download NLTK Resources secara senyap jika belum ada
-try:
-    nltk.data.find("corpora/stopwords")
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("stopwords", quiet=True)
-    nltk.download("punkt", quiet=True)
+# Definisi Device (GPU/CPU) untuk PyTorch, bisa dipaksa lewat setting.DEVICE
+@lru_cache(maxsize=None)
+def resolve_device(name=None):
+    import torch
 
-# Inisialisasi Sastrawi (Hanya sekali agar cepat)
-factory = StemmerFactory()
-stemmer = factory.create_stemmer()
+    name = name or setting.DEVICE
+    if name == "auto":
+        name = "cuda" if torch.cuda.is_available() else "cpu"
+    return torch.device(name)
+
+
+@lru_cache(maxsize=None)
+def ensure_nltk_resources():
+    """Download NLTK Resources secara senyap jika belum ada (sekali saja)."""
+    import nltk
+
+    try:
+        nltk.data.find("corpora/stopwords")
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("stopwords", quiet=True)
+        nltk.download("punkt", quiet=True)
+
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    """
+    Inisialisasi Sastrawi (Hanya sekali, saat pertama dipakai).
+    Cache bawaan Sastrawi tidak dibatasi, jadi kita pakai stemmer dasarnya
+    dengan cache per kata sendiri (LRU di memori + SQLite opsional).
+    """
+    from Sastrawi.Dictionary.ArrayDictionary import ArrayDictionary
+    from Sastrawi.Stemmer.Stemmer import Stemmer
+    from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+
+    return Stemmer(ArrayDictionary(StemmerFactory().get_words()))
+
+
+def create_stem_cache():
+    """Cache hasil stemming per kata: LRU + SQLite opsional (STEM_CACHE_PATH)."""
+    return TieredCache(setting.STEM_CACHE_SIZE, setting.STEM_CACHE_PATH)
+
+
+stem_cache = create_stem_cache()
+
+
+def stem_text(text):
+    """Stemming Sastrawi per kata; setiap kata unik cukup di-stem sekali."""
+    from Sastrawi.Stemmer.Filter import TextNormalizer
+
+    words = TextNormalizer.normalize_text(text).split(" ")
+    stems = []
+    for word in words:
+        stem = stem_cache.get(word)
+        if stem is None:
+            stem = get_stemmer().stem(word)
+            stem_cache.set(word, stem)
+        stems.append(stem)
+    return " ".join(stems)
 
 
 # ==========================================
@@ -73,10 +118,44 @@ def build_keyword_set(ASPECT_KEYWORDS, lang):
     return keywords
 
 
+class PrefixTrie:
+    """
+    Trie dari keyword aspek untuk mencari keyword terpanjang yang menjadi
+    prefix sebuah token dalam O(len(token)), pengganti scan linear.
+    """
+
+    _END = ""  # Penanda akhir keyword (karakter token tidak pernah string kosong)
+
+    def __init__(self, keywords):
+        self.root = {}
+        for kw in keywords:
+            node = self.root
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[self._END] = True
+
+    def longest_proper_prefix(self, token):
+        """Keyword terpanjang yang jadi prefix token (dan != token), atau token itu sendiri."""
+        node = self.root
+        best = 0 if self._END in node else None
+        # Hanya prefix yang lebih pendek dari token (token == keyword tidak dihitung)
+        for i, ch in enumerate(token[:-1]):
+            node = node.get(ch)
+            if node is None:
+                break
+            if self._END in node:
+                best = i + 1
+        return token if best is None else token[:best]
+
+
 def normalize_by_prefix(token, keywords):
     """
-    Normalisasi dengan prefix, jadi huruf setelah base bakal dihapus
+    Normalisasi dengan prefix, jadi huruf setelah base bakal dihapus.
+    `keywords` bisa berupa PrefixTrie (cepat) atau iterable keyword biasa.
     """
+    if isinstance(keywords, PrefixTrie):
+        return keywords.longest_proper_prefix(token)
+
     norm_token = token
     for kw in keywords:
         # Ngecek kalo ada ga kata yang sama depanya dengan token dan milih yang paling besar len-nya
@@ -95,83 +174,127 @@ def normalize_text(text, keywords):
     return " ".join(tokens)
 
 
+def keywords_version(ASPECT_KEYWORDS):
+    """
+    Signature isi kamus aspek (bahasa, aspek, keyword). Berubah setiap kali
+    keyword/kategori ditambah dari panel manajemen aspek.
+    """
+    return tuple(
+        (lang, tuple((aspect, tuple(keywords)) for aspect, keywords in vocab.items()))
+        for lang, vocab in ASPECT_KEYWORDS.items()
+    )
+
+
+def aspect_keywords_from_version(version):
+    """Kebalikan dari keywords_version(): membangun ulang dict kamus aspek."""
+    return {
+        lang: {aspect: list(keywords) for aspect, keywords in vocab}
+        for lang, vocab in version
+    }
+
+
+class Preprocessor:
+    """
+    Konteks preprocessing yang sudah dikompilasi untuk satu versi kamus aspek
+    dan satu bahasa: keyword set, stopword set, dan regex dibangun sekali saja
+    sehingga `clean()` hanya mengerjakan teksnya.
+    """
+
+    URL_PATTERN = re.compile(r"http\S+|www\S+|https\S+", flags=re.MULTILINE)
+    MENTION_PATTERN = re.compile(r"\@\w+|\#\w+")
+    NUMBER_PATTERN = re.compile(r"\b\d+\b")
+    PUNCT_PATTERN = re.compile(r"([.,!?])")
+    SYMBOL_PATTERN = re.compile(r"[^a-z0-9\s.,!?]")
+    REPEAT_PATTERN = re.compile(r"(.)\1{2,}")
+    SPACE_PATTERN = re.compile(r"\s+")
+
+    def __init__(self, ASPECT_KEYWORDS, lang):
+        self.lang = lang
+
+        # Keyword id + en untuk stemming kata yang tidak ada di KBBI
+        self.keywords = frozenset(
+            build_keyword_set(ASPECT_KEYWORDS, "id").union(
+                build_keyword_set(ASPECT_KEYWORDS, "en")
+            )
+        )
+        self.keyword_trie = PrefixTrie(self.keywords)
+
+        # Stopword tanpa kata negasi
+        ensure_nltk_resources()
+        from nltk.corpus import stopwords
+
+        stop_lang = "indonesian" if lang == "id" else "english"
+        self.stops = frozenset(
+            set(stopwords.words(stop_lang)) - setting.NEGATION_WORDS
+        )
+
+    def clean(self, text, use_stemming=True):
+        """Membersihkan teks dengan standar NLP Professional."""
+        if not isinstance(text, str):
+            return ""
+
+        # 1. Lowercase
+        text = str(text).lower()
+
+        # 2. Hapus URL & Mention/Hashtag
+        text = self.URL_PATTERN.sub("", text)
+        text = self.MENTION_PATTERN.sub("", text)
+
+        # 3. Hapus Angka murni (4g, mp3 tetap dipertahankan)
+        text = self.NUMBER_PATTERN.sub("", text)
+
+        # 4. Handle Tanda Baca untuk Segmentasi (Keep . , ! ? tapi kasih spasi)
+        text = self.PUNCT_PATTERN.sub(r" \1 ", text)
+
+        # 5. Hapus karakter simbol aneh (keep alpha-numeric & punctuation)
+        text = self.SYMBOL_PATTERN.sub(" ", text)
+
+        # 6. Reduksi karakter berulang (Baangeeet -> banget)
+        text = self.REPEAT_PATTERN.sub(r"\1\1", text)
+
+        # 7. Normalisasi Spasi
+        text = self.SPACE_PATTERN.sub(" ", text).strip()
+
+        # 8. Fix kata yg ga di KBBI
+        text = normalize_text(text, self.keyword_trie)
+
+        # 9. Tokenisasi
+        tokens = text.split()
+
+        # 10. Handling per Bahasa
+        if self.lang == "id":
+            # Normalisasi Slang
+            tokens = [setting.SLANG_MAP.get(t, t) for t in tokens]
+
+            # Stemming Sastrawi (pakai cache per kata, jadi review panjang tetap cepat)
+            if use_stemming:
+                try:
+                    # Re-join dulu karena Sastrawi lebih cepat proses string
+                    temp_text = " ".join(tokens)
+                    temp_text = stem_text(temp_text)
+
+                    tokens = temp_text.split()
+                except:
+                    pass
+
+        # 11. Stopword Removal (Hati-hati dengan Negasi)
+        tokens = [t for t in tokens if t not in self.stops]
+        return " ".join(tokens)
+
+
+@lru_cache(maxsize=16)
+def _build_preprocessor(version, lang):
+    return Preprocessor(aspect_keywords_from_version(version), lang)
+
+
+def get_preprocessor(ASPECT_KEYWORDS, lang):
+    """Mengambil Preprocessor (cache per versi kamus aspek & bahasa)."""
+    return _build_preprocessor(keywords_version(ASPECT_KEYWORDS), lang)
+
+
 def clean_text_advanced(ASPECT_KEYWORDS, text, lang="en", use_stemming=True):
     """Membersihkan teks dengan standar NLP Professional."""
-    # Membuat keyword id untuk stemming kata tidak diKBBI
-    KEYWORDS_ID = build_keyword_set(ASPECT_KEYWORDS, "id")
-    KEYWORDS_EN = build_keyword_set(ASPECT_KEYWORDS, "en")
-    KEYWORDS = KEYWORDS_ID.union(KEYWORDS_EN)
-
-    if not isinstance(text, str):
-        return ""
-
-    # 1. Lowercase
-    text = str(text).lower()
-    print(f"text lower case : {text}")
-
-    # 2. Hapus URL & Mention/Hashtag
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"\@\w+|\#\w+", "", text)
-    print(f"text hashtag : {text}")
-
-    # 3. Hapus Angka (Kecuali yang nempel sama huruf seperti 4g, mp3 biar konteks jalan)
-    # Opsional, di sini kita hapus angka murni saja
-    text = re.sub(r"\b\d+\b", "", text)
-    print(f"text hapus angka : {text}")
-
-    # 4. Handle Tanda Baca untuk Segmentasi (Keep . , ! ? tapi kasih spasi)
-    # Tujuannya agar tokenisasi nanti memisahkan "bagus." menjadi "bagus" dan "."
-    text = re.sub(r"([.,!?])", r" \1 ", text)
-    print(f"text tanda baca : {text}")
-
-    # 5. Hapus karakter simbol aneh (keep alpha-numeric & punctuation)
-    text = re.sub(r"[^a-z0-9\s.,!?]", " ", text)
-    print(f"text simbol : {text}")
-
-    # 6. Reduksi karakter berulang (Baangeeet -> banget)
-    text = reduce_repeating_chars(text)
-    print(f"text repeating char : {text}")
-
-    # 7. Normalisasi Spasi
-    text = re.sub(r"\s+", " ", text).strip()
-    print(f"normalisasi spasi : {text}")
-
-    # 8. Fix kata yg ga di KBBI
-    print(f"Temp text sebelum fix uinya : {text}")
-    # text = fix_ui_nya(text)  # Stemming kata ui
-    text = normalize_text(text, KEYWORDS)
-
-    print(f"Temp text setelah fix uinya : {text}")
-
-    # 9. Tokenisasi
-    tokens = text.split()
-
-    # 10. Handling per Bahasa
-    if lang == "id":
-        # Normalisasi Slang
-        tokens = [setting.SLANG_MAP.get(t, t) for t in tokens]
-
-        # Stemming Sastrawi (Optional: Bisa dimatikan jika terlalu lambat untuk batch besar)
-        # Kita limit hanya stem kalimat < 30 kata agar responsif di Streamlit
-        if use_stemming and len(tokens) < 30:
-            try:
-                # Re-join dulu karena Sastrawi lebih cepat proses string
-                temp_text = " ".join(tokens)
-                temp_text = stemmer.stem(temp_text)
-
-                tokens = temp_text.split()
-            except:
-                pass
-
-    # 11. Stopword Removal (Hati-hati dengan Negasi)
-    if lang == "id":
-        stops = set(stopwords.words("indonesian")) - setting.NEGATION_WORDS
-    else:
-        stops = set(stopwords.words("english")) - setting.NEGATION_WORDS
-
-    tokens = [t for t in tokens if t not in stops]
-    print(" ".join(tokens))
-    return " ".join(tokens)
+    return get_preprocessor(ASPECT_KEYWORDS, lang).clean(text, use_stemming)
 
 
 # ==========================================
@@ -179,31 +302,234 @@ def clean_text_advanced(ASPECT_KEYWORDS, text, lang="en", use_stemming=True):
 # ==========================================
 
 
-@st.cache_resource(show_spinner=False)
-def load_all_models():
+def configure_torch_threads():
+    """Mengatur jumlah thread intra-op PyTorch (setting.TORCH_NUM_THREADS)."""
+    import torch
+
+    if setting.TORCH_NUM_THREADS:
+        torch.set_num_threads(setting.TORCH_NUM_THREADS)
+
+
+def quantize_model(model):
+    """Dynamic int8 quantization untuk semua layer Linear (hanya jalan di CPU)."""
+    import torch
+
+    quantized = torch.ao.quantization.quantize_dynamic(
+        model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8
+    )
+    quantized.cache_id = f"{model.name_or_path}:int8"
+    return quantized
+
+
+def prepare_model_for_inference(model, mode=None):
     """
-    Memuat semua model AI ke RAM. Menggunakan Cache Streamlit
-    agar tidak loading ulang setiap ada interaksi user.
+    Pindahkan model ke device dan set eval mode (dropout off), sekali saja.
+    Mode "quantized" mengubah layer Linear ke int8 (model tetap di CPU).
     """
-    try:
-        # Load English Models
-        path_en = "Hamusssss12/spotify-absa-english-v2"
-        tok_bert_en = AutoTokenizer.from_pretrained(path_en)
-        mod_bert_en = AutoModelForSequenceClassification.from_pretrained(path_en)
+    mode = mode or setting.MODEL_MODE
+    model.eval()
+    model.requires_grad_(False)
+    if mode == "quantized":
+        return quantize_model(model)
 
-        # Load Indonesian Models
-        path_id = "Hamusssss12/spotify-absa-indonesian-v2"
-        tok_bert_id = AutoTokenizer.from_pretrained(path_id)
-        mod_bert_id = AutoModelForSequenceClassification.from_pretrained(path_id)
-        # Note: LSTM Models kita keep untuk keperluan advanced development/comparison jika perlu
-        # Tapi untuk deployment utama, kita pakai Transformer (BERT) karena akurasi lebih tinggi.
+    model.to(resolve_device())
+    return model
 
-        return {"en": (mod_bert_en, tok_bert_en), "id": (mod_bert_id, tok_bert_id)}
 
-    except Exception as e:
-        st.error(f"⚠️ Error Critical: Gagal memuat model AI. Pesan Error: {str(e)}")
-        st.info("Pastikan folder 'models' berisi hasil ekstrak ZIP yang benar.")
-        return None, None
+def load_classifier(model_path, tokenizer, mode=None, **load_kwargs):
+    """
+    Memuat classifier sesuai setting.INFERENCE_BACKEND ("torch" / "onnx").
+    `mode` ("fp32" / "quantized", default setting.MODEL_MODE) berlaku untuk backend torch.
+    `load_kwargs` diteruskan ke from_pretrained (mis. local_files_only).
+    """
+    if setting.INFERENCE_BACKEND == "onnx":
+        import onnx_backend  # Opsional: hanya perlu onnxruntime jika dipakai
+
+        return onnx_backend.load_onnx_classifier(model_path, tokenizer)
+
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_path, **load_kwargs
+    )
+    return prepare_model_for_inference(model, mode)
+
+
+def model_memory_mb(model):
+    """Perkiraan memori bobot model (MB), termasuk bobot int8 yang sudah di-pack."""
+    if getattr(model, "framework", "pt") == "np":
+        return os.path.getsize(model.onnx_path) / (1024 * 1024)
+
+    import torch
+
+    def tensor_bytes(value):
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(v) for v in value)
+        return 0
+
+    total = sum(tensor_bytes(v) for v in model.state_dict().values())
+    return total / (1024 * 1024)
+
+
+class ModelLoadError(RuntimeError):
+    """Model tidak bisa dimuat (hub/jaringan, file rusak, dsb.)."""
+
+
+class LazyModelStore:
+    """
+    Penyimpan model per bahasa yang dimuat saat pertama kali dipakai.
+    - Model yang tidak dipakai lebih lama dari `idle_ttl` detik di-unload.
+    - Total memori model dijaga di bawah `memory_budget_mb` dengan meng-unload
+      model yang paling lama tidak dipakai.
+    Jika `bundle_dir` diisi, model dibaca dari bundle lokal (lihat model_bundle)
+    tanpa akses ke Hugging Face hub.
+    Akses seperti dict: store["id"] -> (model, tokenizer).
+    """
+
+    def __init__(
+        self,
+        model_paths,
+        mode=None,
+        idle_ttl=None,
+        memory_budget_mb=None,
+        bundle_dir=None,
+    ):
+        self.model_paths = model_paths
+        self.bundle_dir = bundle_dir
+        self.mode = mode
+        self.idle_ttl = idle_ttl
+        self.memory_budget_mb = memory_budget_mb
+        self.models = {}  # lang -> (model, tokenizer)
+        self.last_used = {}
+        self.memory = {}
+        self.lock = threading.RLock()
+        self.reaper = None
+
+    def __getitem__(self, lang):
+        return self.get(lang)
+
+    def get(self, lang):
+        with self.lock:
+            if lang not in self.models:
+                self._load(lang)
+            self.last_used[lang] = time.monotonic()
+            return self.models[lang]
+
+    def _load(self, lang):
+        if self.bundle_dir:
+            # Bundle lokal: checksum sudah dicek di load_all_models, di sini
+            # cukup kelengkapan file. Bobot safetensors di-load memory-mapped.
+            path = model_bundle.verify_bundle(self.bundle_dir, lang, check_hashes=False)
+            load_kwargs = {"local_files_only": True}
+            model_kwargs = {"local_files_only": True, "use_safetensors": True}
+        elif lang in self.model_paths:
+            path = self.model_paths[lang]
+            load_kwargs = model_kwargs = {}
+        else:
+            raise KeyError(f"Tidak ada model untuk bahasa '{lang}'")
+
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(path, **load_kwargs)
+            model = load_classifier(path, tokenizer, self.mode, **model_kwargs)
+        except Exception as e:
+            raise ModelLoadError(f"Gagal memuat model '{lang}' ({path}): {e}") from e
+        self.models[lang] = (model, tokenizer)
+        self.memory[lang] = model_memory_mb(model)
+        print(f"Model '{lang}' dimuat ({self.memory[lang]:.0f} MB)")
+
+        self._enforce_budget(keep=lang)
+        self._start_reaper()
+
+    def _enforce_budget(self, keep):
+        if not self.memory_budget_mb:
+            return
+        while self.memory_mb() > self.memory_budget_mb:
+            others = [lang for lang in self.models if lang != keep]
+            if not others:
+                print(f"Model '{keep}' sendiri sudah melebihi budget memori")
+                return
+            self.unload(min(others, key=lambda lang: self.last_used.get(lang, 0)))
+
+    def _start_reaper(self):
+        if not self.idle_ttl or self.reaper is not None:
+            return
+
+        def reap():
+            while True:
+                time.sleep(max(self.idle_ttl / 2, 1))
+                self.unload_idle()
+
+        self.reaper = threading.Thread(target=reap, name="model-reaper", daemon=True)
+        self.reaper.start()
+
+    def unload(self, lang):
+        with self.lock:
+            if self.models.pop(lang, None) is not None:
+                self.memory.pop(lang, None)
+                self.last_used.pop(lang, None)
+                gc.collect()
+                print(f"Model '{lang}' di-unload")
+
+    def unload_idle(self):
+        """Unload model yang idle lebih lama dari idle_ttl. Return bahasa yang di-unload."""
+        if not self.idle_ttl:
+            return []
+        with self.lock:
+            now = time.monotonic()
+            idle = [
+                lang
+                for lang, last in self.last_used.items()
+                if now - last > self.idle_ttl
+            ]
+            for lang in idle:
+                self.unload(lang)
+            return idle
+
+    def loaded_languages(self):
+        return list(self.models)
+
+    def memory_mb(self):
+        return sum(self.memory.values())
+
+
+@lru_cache(maxsize=None)
+def load_all_models(mode=None, verify_hashes=True):
+    """
+    Menyiapkan model AI per bahasa. Di-cache per proses (tanpa Streamlit, agar
+    bisa dipakai CLI) sehingga store model dipakai bersama; model baru dimuat
+    ke RAM saat bahasa itu pertama kali dipakai (lihat LazyModelStore).
+    `mode`: "fp32" atau "quantized" (default setting.MODEL_MODE).
+    `verify_hashes=False` melewati checksum bundle (mis. worker pool: proses
+    induk sudah memverifikasinya).
+    """
+    # Setup sekali: thread CPU. Device & eval mode diatur saat model dimuat,
+    # jadi path inference per panggilan cukup tokenisasi + forward saja.
+    configure_torch_threads()
+
+    # Bundle lokal dicek di awal (file lengkap + checksum) agar file bobot yang
+    # rusak membuat startup gagal cepat dengan ModelBundleError yang jelas,
+    # bukan traceback di request pertama
+    if setting.MODEL_BUNDLE_DIR:
+        for lang in setting.MODEL_PATHS:
+            model_bundle.verify_bundle(
+                setting.MODEL_BUNDLE_DIR,
+                lang,
+                check_hashes=verify_hashes and setting.MODEL_BUNDLE_VERIFY,
+            )
+
+    # Note: LSTM Models kita keep untuk keperluan advanced development/comparison jika perlu
+    # Tapi untuk deployment utama, kita pakai Transformer (BERT) karena akurasi lebih tinggi.
+    return LazyModelStore(
+        setting.MODEL_PATHS,
+        mode=mode,
+        idle_ttl=setting.MODEL_IDLE_TTL,
+        memory_budget_mb=setting.MODEL_MEMORY_BUDGET_MB,
+        bundle_dir=setting.MODEL_BUNDLE_DIR,
+    )
 
 
 # ==========================================
@@ -211,10 +537,67 @@ def load_all_models():
 # ==========================================
 
 
-def detect_language(text):
-    """Mendeteksi bahasa input (ID/EN) secara otomatis."""
+LANG_TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+
+@lru_cache(maxsize=1)
+def language_vocab():
+    """
+    Skor kata untuk deteksi bahasa dari aset yang sudah ada: stopword NLTK,
+    nilai SLANG_MAP (kata baku Indonesia), dan kamus aspek Inggris.
+    +1 = khas Indonesia, -1 = khas Inggris; kata yang muncul di kedua bahasa
+    diabaikan. Key SLANG_MAP dan kamus aspek Indonesia banyak berisi kata
+    Inggris ("good", "love", "songs", "login"), jadi key SLANG_MAP tidak
+    dipakai dan kata di kamus aspek Indonesia dianggap netral.
+    """
+    ensure_nltk_resources()
+    from nltk.corpus import stopwords
+
+    def words_of(phrases):
+        return {w for phrase in phrases for w in LANG_TOKEN_PATTERN.findall(phrase.lower())}
+
+    id_words = set(stopwords.words("indonesian"))
+    id_words |= words_of(setting.SLANG_MAP.values())
+
+    en_words = set(stopwords.words("english"))
+    en_words |= words_of(k for v in setting.ASPECT_KEYWORDS["en"].values() for k in v)
+
+    loanwords = words_of(
+        k for v in setting.ASPECT_KEYWORDS["id"].values() for k in v
+    ) - id_words
+    both = (id_words & en_words) | loanwords
+    vocab = {w: 1 for w in id_words - both}
+    vocab.update({w: -1 for w in en_words - both})
+    return vocab
+
+
+def score_language(text, vocab):
+    """Return (jumlah kata khas ID, jumlah kata khas EN) dalam teks."""
+    id_hits = en_hits = 0
+    for word in LANG_TOKEN_PATTERN.findall(text.lower()):
+        score = vocab.get(word)
+        if score == 1:
+            id_hits += 1
+        elif score == -1:
+            en_hits += 1
+    return id_hits, en_hits
+
+
+@lru_cache(maxsize=1)
+def _seed_langdetect():
+    # langdetect acak tanpa seed; seed tetap agar hasil deterministik
+    from langdetect import DetectorFactory
+
+    DetectorFactory.seed = 0
+
+
+def detect_language_langdetect(text):
+    """Deteksi bahasa dengan langdetect (lambat, dipakai untuk kasus ambigu)."""
     try:
         # Deteksi cepat
+        _seed_langdetect()
+        from langdetect import detect
+
         lang = detect(text)
         return "id" if lang == "id" or lang == "in" else "en"
     except:
@@ -224,127 +607,412 @@ def detect_language(text):
         return "en"
 
 
-def get_bert_prob(text, model, tokenizer, lang):
-    """Mengembalikan skor probabilitas POSITIVE (0.0 - 1.0)."""
-    # Pindahkan ke CPU untuk deployment (kecuali server ada GPU)
-    # Ini aman untuk Streamlit Cloud/Lokal Laptop biasa
-    model.to("cpu")
+def detect_languages(texts, stats=None):
+    """
+    Mendeteksi bahasa (ID/EN) untuk banyak review sekaligus.
+    Review diskor dengan kamus kata khas tiap bahasa; hanya review yang
+    ambigu (sedikit bukti / selisih tipis) yang diteruskan ke langdetect.
+    Jika `stats` berupa dict, jumlah keputusan "vocab" vs "langdetect" dicatat.
+    """
+    vocab = language_vocab()
+    min_hits = setting.LANG_DETECT_MIN_HITS
+    min_margin = setting.LANG_DETECT_MIN_MARGIN
+
+    decided = {}
+    langs = []
+    for text in texts:
+        text = str(text)
+        if text not in decided:
+            id_hits, en_hits = score_language(text, vocab)
+            total = id_hits + en_hits
+            if total >= min_hits and abs(id_hits - en_hits) / total >= min_margin:
+                decided[text] = "id" if id_hits > en_hits else "en"
+                source = "vocab"
+            else:
+                decided[text] = detect_language_langdetect(text)
+                source = "langdetect"
+            if stats is not None:
+                stats[source] = stats.get(source, 0) + 1
+        langs.append(decided[text])
+    return langs
 
-    inputs = tokenizer(
-        text, return_tensors="pt", truncation=True, padding=True, max_length=128
-    )
 
-    with torch.no_grad():
-        logits = model(**inputs).logits
-        probs = F.softmax(logits, dim=1).cpu().numpy()[0]
+def detect_language(text):
+    """Mendeteksi bahasa input (ID/EN) secara otomatis."""
+    return detect_languages([text])[0]
+
 
-    if lang == "en":
-        return probs[1]  # Probabilitas kelas 1 (Positive)
-    elif lang == "id":
-        return probs[0]  # Probabilitas kelas 0 (Positive)
+# Index kelas POSITIVE pada output masing-masing model
+POSITIVE_CLASS_INDEX = {"en": 1, "id": 0}
 
 
-def get_smart_aspects(ASPECT_KEYWORDS, segment, lang):
+def bucket_by_length(lengths, batch_size):
     """
-    Mendeteksi aspek + Mengembalikan kata pemicunya.
-    Output: [('Audio', 'suara'), ('Price', 'mahal')]
+    Mengelompokkan index teks dengan panjang token yang mirip (diurutkan
+    berdasarkan panjang) ke dalam bucket berukuran maksimal `batch_size`.
     """
-    detected = []
-    text_lower = segment.lower()
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_stats(lengths):
+    """Statistik padding untuk satu batch (token asli vs token setelah padding)."""
+    real_tokens = int(sum(lengths))
+    padded_tokens = len(lengths) * max(lengths)
+    return {
+        "batch_size": len(lengths),
+        "max_len": max(lengths),
+        "real_tokens": real_tokens,
+        "padded_tokens": padded_tokens,
+        "waste": 1.0 - real_tokens / padded_tokens,
+    }
+
+
+def summarize_padding(stats):
+    """Ringkasan padding waste dari list hasil `padding_stats`."""
+    real_tokens = sum(s["real_tokens"] for s in stats)
+    padded_tokens = sum(s["padded_tokens"] for s in stats)
+    return {
+        "batches": len(stats),
+        "real_tokens": real_tokens,
+        "padded_tokens": padded_tokens,
+        "waste": 1.0 - real_tokens / padded_tokens if padded_tokens else 0.0,
+    }
+
+
+def create_inference_cache():
+    """
+    Cache hasil inference: (model id, bahasa, segmen ternormalisasi) -> prob POSITIVE.
+    LRU di memori + SQLite opsional (setting.INFERENCE_CACHE_PATH).
+    """
+    return TieredCache(setting.INFERENCE_CACHE_SIZE, setting.INFERENCE_CACHE_PATH)
 
-    # Ambil kamus sesuai bahasa
-    vocab = ASPECT_KEYWORDS.get(lang, ASPECT_KEYWORDS["en"])
 
-    for aspect, keywords in vocab.items():
-        for key in keywords:
-            # Gunakan regex word boundary agar akurat ('ads' not in 'loads')
-            pattern = r"\b" + re.escape(key) + r"\b"
-            match = re.search(pattern, text_lower)
-            if match:
-                detected.append((aspect, key))  # Simpan Nama Aspek & Kata Pemicu
-                break  # Cukup 1 trigger per aspek per segmen
+def model_cache_id(model):
+    """Identitas model untuk key cache (beda model/varian = beda key)."""
+    return getattr(model, "cache_id", None) or getattr(
+        model, "name_or_path", type(model).__name__
+    )
+
 
-    return detected
+def inference_cache_key(model_id, lang, text):
+    """Key cache berbasis hash konten (spasi dinormalisasi)."""
+    normalized = " ".join(text.split())
+    raw = f"{model_id}\x1f{lang}\x1f{normalized}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 
-def analyze_single_review_complete(ASPECT_KEYWORDS, text, models_tuple, lang="auto"):
+def _forward_probs(texts, model, tokenizer, lang, batch_size, stats):
     """
-    PIPELINE UTAMA ABSA END-TO-END
-    Menerima teks -> Cleaning -> Split Segmen -> Deteksi Aspek -> Scoring BERT.
+    Forward pass BERT dengan bucketing panjang token (tanpa cache).
+    Model diasumsikan sudah disiapkan oleh load_classifier(); model ONNX
+    (framework "np") menerima & mengembalikan numpy array.
     """
-    # 1. Identifikasi Bahasa & Model
-    models_en, models_id = models_tuple
-    if not models_en or not models_id:
-        return "Error", 0.0, {}, "en"
+    framework = getattr(model, "framework", "pt")
 
-    if lang == "auto":
-        lang = detect_language(text)
+    # Tokenisasi tanpa padding dulu untuk mengetahui panjang tiap teks
+    encodings = tokenizer(list(texts), truncation=True, max_length=128)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
 
-    # Load pasangan model & tokenizer yang tepat
-    if lang == "id":
-        model, tokenizer = models_id
-    else:
-        model, tokenizer = models_en
-
-    # 2. Preprocessing & Segmentasi Kalimat
-    # Kita pisah kalimat jika ada tanda baca atau kata hubung kontras
-    if lang == "id":
-        delimiters = (
-            r"("
-            r"\.|!|\?|;|,\s|"
-            r"\btapi\b|\btp\b|\btetapi\b|\bnamun\b|\bmelainkan\b|\bakan tetapi\b|"
-            r"\bpadahal\b|\bsedangkan\b|\bsebaliknya\b|\bjustru\b|"
-            r"\bwalaupun\b|\bwalau\b|\bmeskipun\b|\bmeski\b|\bkendati\b|\bbiarpun\b|"
-            r"\bcuma\b|\bcman\b|\bcma\b|\bcm\b|\bhanya\b|\bhanya saja\b|"
-            r"\bsayang\b|\bsayangnya\b|\bsyg\b|\bdisayangkan\b|"
-            r"\bkecuali\b|\bselain itu\b"
-            r")"
+    probs = np.zeros(len(texts), dtype=np.float32)
+    for idx in bucket_by_length(lengths, batch_size):
+        inputs = tokenizer.pad(
+            {key: [values[i] for i in idx] for key, values in encodings.items()},
+            return_tensors=framework,
         )
-    else:
-        delimiters = (
-            r"("
-            r"\.|!|\?|;|,\s|"
-            r"\bbut\b|\bhowever\b|\byet\b|\bnevertheless\b|\bnonetheless\b|"
-            r"\balthough\b|\bthough\b|\beven though\b|\balbeit\b|"
-            r"\bdespite\b|\bin spite of\b|\bregardless\b|"
-            r"\bwhile\b|\bwhereas\b|\bon the other hand\b|"
-            r"\bexcept\b|\bexception\b|\bunless\b|\bbarring\b|"
-            r"\bunfortunately\b|\bsadly\b|\bregrettably\b|\bpity\b"
-            r")"
+        if stats is not None:
+            stats.append(padding_stats([lengths[i] for i in idx]))
+
+        if framework == "np":
+            logits = model(**inputs).logits
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            batch_probs = exp / exp.sum(axis=1, keepdims=True)
+        else:
+            import torch
+
+            with torch.inference_mode():
+                logits = model(**inputs.to(model.device)).logits
+                batch_probs = torch.softmax(logits, dim=1).cpu().numpy()
+
+        probs[idx] = batch_probs[:, POSITIVE_CLASS_INDEX[lang]]
+
+    return probs
+
+
+def get_bert_probs(
+    texts, model, tokenizer, lang, batch_size=None, stats=None, cache=None
+):
+    """
+    Mengembalikan skor probabilitas POSITIVE (0.0 - 1.0) untuk banyak teks.
+    Teks ditokenisasi sekali, dikelompokkan per panjang token (bucketing) agar
+    padding minimal, di-score per bucket, lalu dikembalikan ke urutan asal.
+    Jika `stats` berupa list, statistik padding tiap batch ditambahkan ke sana.
+    Jika `cache` diberikan (lihat create_inference_cache), hanya teks yang
+    belum pernah di-score yang masuk ke model.
+    """
+    if lang not in POSITIVE_CLASS_INDEX:
+        return None
+    if not texts:
+        return np.array([], dtype=np.float32)
+
+    batch_size = batch_size or setting.BATCH_SIZE
+
+    if cache is None:
+        return _forward_probs(texts, model, tokenizer, lang, batch_size, stats)
+
+    model_id = model_cache_id(model)
+    keys = [inference_cache_key(model_id, lang, text) for text in texts]
+
+    probs = np.zeros(len(texts), dtype=np.float32)
+    missing = {}  # key -> index teks pertama yang belum ada di cache
+    for i, key in enumerate(keys):
+        cached = cache.get(key) if key not in missing else None
+        if cached is not None:
+            probs[i] = cached
+        elif key not in missing:
+            missing[key] = i
+
+    if missing:
+        miss_idx = list(missing.values())
+        miss_probs = _forward_probs(
+            [texts[i] for i in miss_idx], model, tokenizer, lang, batch_size, stats
         )
+        computed = {}
+        for i, prob in zip(miss_idx, miss_probs):
+            computed[keys[i]] = prob
+            cache.set(keys[i], float(prob))
+        for i, key in enumerate(keys):
+            if key in computed:
+                probs[i] = computed[key]
+
+    return probs
+
 
-    raw_segments = re.split(delimiters, text.lower())
+def get_bert_prob(text, model, tokenizer, lang):
+    """Mengembalikan skor probabilitas POSITIVE (0.0 - 1.0)."""
+    probs = get_bert_probs([text], model, tokenizer, lang)
+    if probs is None:
+        return None
+    return probs[0]
+
+
+def _is_word_char(ch):
+    """Sama dengan definisi \\w pada regex Python (alfanumerik Unicode atau '_')."""
+    return ch.isalnum() or ch == "_"
+
+
+class AspectMatcher:
+    """
+    Matcher multi-keyword (Aho-Corasick) untuk satu versi kamus aspek dan satu
+    bahasa. Segmen cukup di-scan sekali untuk menemukan semua keyword, dengan
+    aturan word boundary yang sama seperti regex r"\\bkeyword\\b".
+    """
+
+    def __init__(self, vocab):
+        self.aspects = list(vocab.keys())
+        self.keywords = [list(keywords) for keywords in vocab.values()]
+
+        # Keyword unik -> daftar posisi (index aspek, index keyword) di kamus
+        self.positions = {}
+        for aspect_idx, keywords in enumerate(self.keywords):
+            for key_idx, key in enumerate(keywords):
+                if key:
+                    self.positions.setdefault(key, []).append((aspect_idx, key_idx))
+
+        # Bangun automaton: goto, fail link, dan output per state
+        self.goto = [{}]
+        self.output = [[]]
+        for key in self.positions:
+            state = 0
+            for ch in key:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append(key)
+
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.output[next_state] = (
+                    self.output[next_state] + self.output[self.fail[next_state]]
+                )
+
+    def find_keywords(self, text):
+        """Set keyword yang muncul di `text` dengan word boundary valid di kedua sisi."""
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for key in output[state]:
+                if key in found:
+                    continue
+                start = end - len(key) + 1
+                before = start > 0 and _is_word_char(text[start - 1])
+                after = end + 1 < len(text) and _is_word_char(text[end + 1])
+                if before != _is_word_char(key[0]) and after != _is_word_char(
+                    key[-1]
+                ):
+                    found.add(key)
+        return found
+
+    def match(self, segment):
+        """Output: [(aspek, trigger)] dengan 1 trigger (keyword pertama) per aspek."""
+        best = {}
+        for key in self.find_keywords(segment.lower()):
+            for aspect_idx, key_idx in self.positions[key]:
+                if key_idx < best.get(aspect_idx, len(self.keywords[aspect_idx])):
+                    best[aspect_idx] = key_idx
+
+        return [
+            (self.aspects[aspect_idx], self.keywords[aspect_idx][best[aspect_idx]])
+            for aspect_idx in sorted(best)
+        ]
+
+
+@lru_cache(maxsize=16)
+def _build_aspect_matcher(version, lang):
+    ASPECT_KEYWORDS = aspect_keywords_from_version(version)
+    return AspectMatcher(ASPECT_KEYWORDS.get(lang, ASPECT_KEYWORDS["en"]))
+
+
+def get_aspect_matcher(ASPECT_KEYWORDS, lang):
+    """Mengambil AspectMatcher (dibangun ulang otomatis jika kamus aspek berubah)."""
+    return _build_aspect_matcher(keywords_version(ASPECT_KEYWORDS), lang)
+
+
+def get_smart_aspects(ASPECT_KEYWORDS, segment, lang):
+    """
+    Mendeteksi aspek + Mengembalikan kata pemicunya.
+    Output: [('Audio', 'suara'), ('Price', 'mahal')]
+    """
+    # Word boundary tetap dijaga agar akurat ('ads' not in 'loads')
+    return get_aspect_matcher(ASPECT_KEYWORDS, lang).match(segment)
+
+
+# Delimiter segmentasi: tanda baca atau kata hubung kontras per bahasa
+SEGMENT_DELIMITERS = {
+    "id": re.compile(
+        r"("
+        r"\.|!|\?|;|,\s|"
+        r"\btapi\b|\btp\b|\btetapi\b|\bnamun\b|\bmelainkan\b|\bakan tetapi\b|"
+        r"\bpadahal\b|\bsedangkan\b|\bsebaliknya\b|\bjustru\b|"
+        r"\bwalaupun\b|\bwalau\b|\bmeskipun\b|\bmeski\b|\bkendati\b|\bbiarpun\b|"
+        r"\bcuma\b|\bcman\b|\bcma\b|\bcm\b|\bhanya\b|\bhanya saja\b|"
+        r"\bsayang\b|\bsayangnya\b|\bsyg\b|\bdisayangkan\b|"
+        r"\bkecuali\b|\bselain itu\b"
+        r")"
+    ),
+    "en": re.compile(
+        r"("
+        r"\.|!|\?|;|,\s|"
+        r"\bbut\b|\bhowever\b|\byet\b|\bnevertheless\b|\bnonetheless\b|"
+        r"\balthough\b|\bthough\b|\beven though\b|\balbeit\b|"
+        r"\bdespite\b|\bin spite of\b|\bregardless\b|"
+        r"\bwhile\b|\bwhereas\b|\bon the other hand\b|"
+        r"\bexcept\b|\bexception\b|\bunless\b|\bbarring\b|"
+        r"\bunfortunately\b|\bsadly\b|\bregrettably\b|\bpity\b"
+        r")"
+    ),
+}
+
+
+def models_ready(models_tuple):
+    """Cek model siap dipakai: LazyModelStore, atau tuple (models_en, models_id) lengkap."""
+    if isinstance(models_tuple, LazyModelStore):
+        return True
+    models_en, models_id = models_tuple
+    return bool(models_en and models_id)
+
+
+def select_model(models_tuple, lang):
+    """
+    Memilih pasangan (model, tokenizer) sesuai bahasa. None jika model belum siap.
+    `models_tuple` bisa berupa LazyModelStore atau tuple (models_en, models_id).
+    """
+    if not models_ready(models_tuple):
+        return None
+    if isinstance(models_tuple, LazyModelStore):
+        return models_tuple.get("id" if lang == "id" else "en")
+    models_en, models_id = models_tuple
+    return models_id if lang == "id" else models_en
+
+
+def split_segments(text, lang):
+    """Memecah review menjadi segmen kalimat (minimal 2 kata per segmen)."""
+    delimiters = SEGMENT_DELIMITERS["id" if lang == "id" else "en"]
+    raw_segments = delimiters.split(text.lower())
     segments = [s.strip() for s in raw_segments if len(s.split()) >= 2]
     if not segments:
         segments = [text]  # Fallback jika kalimat pendek
+    return segments
 
-    aspect_sentiment_store = {}
 
-    # 3. Loop Analisis per Segmen
-    for seg in segments:
-        print(f"seg : {seg}")
-        seg_clean = clean_text_advanced(ASPECT_KEYWORDS, seg, lang, use_stemming=True)
-        print(f"seg_clean : {seg_clean}")
-        # A. Deteksi Aspek & Trigger
-        found_aspects = get_smart_aspects(ASPECT_KEYWORDS, seg_clean, lang)
-        print(f"found_aspects : {found_aspects}")
+def compile_keywords(ASPECT_KEYWORDS, lang):
+    """
+    (Preprocessor, AspectMatcher) untuk kamus aspek & bahasa ini. Versi kamus
+    cukup dihitung sekali lalu objeknya diteruskan ke prepare_review, bukan
+    dihitung ulang di setiap segmen.
+    """
+    version = keywords_version(ASPECT_KEYWORDS)
+    return _build_preprocessor(version, lang), _build_aspect_matcher(version, lang)
+
+
+def prepare_review(ASPECT_KEYWORDS, text, lang, compiled=None):
+    """
+    Tahap CPU dari pipeline (tanpa model): Split Segmen -> Cleaning -> Deteksi Aspek.
+    Output berupa 'plan' yang berisi daftar teks yang perlu di-score BERT
+    (segmen beraspek + teks global di posisi terakhir).
+    `compiled` (opsional): hasil compile_keywords, agar bisa dipakai ulang
+    untuk banyak review sekaligus.
+    """
+    preprocessor, matcher = compiled or compile_keywords(ASPECT_KEYWORDS, lang)
+
+    scored_segments = []  # [(teks segmen, [(aspek, trigger), ...])]
+    for seg in split_segments(text, lang):
+        seg_clean = preprocessor.clean(seg, use_stemming=True)
+        # Deteksi Aspek & Trigger
+        found_aspects = matcher.match(seg_clean)
         if found_aspects:
-            # B. Hitung Sentimen Segmen ini
-            # Preprocess khusus model (pake stemming jika perlu)
-            if not seg_clean:
-                seg_clean = seg
-            pos_prob = get_bert_prob(seg, model, tokenizer, lang)
-
-            # Simpan hasil
-            for aspect_name, trigger_word in found_aspects:
-                if aspect_name not in aspect_sentiment_store:
-                    aspect_sentiment_store[aspect_name] = []
-
-                aspect_sentiment_store[aspect_name].append(
-                    {"prob": pos_prob, "trigger": trigger_word}
-                )
-    print(f"aspect_sentiment_store : {aspect_sentiment_store}")
-    # 4. Aggregasi Hasil Aspek (Average & Logic)
+            scored_segments.append((seg, found_aspects))
+
+    # Global text ikut di-batch bersama segmen
+    clean_global = preprocessor.clean(text, use_stemming=True)
+
+    return {
+        "lang": lang,
+        "segments": scored_segments,
+        "score_texts": [seg for seg, _ in scored_segments] + [clean_global],
+    }
+
+
+def aggregate_review(plan, probs):
+    """
+    Tahap akhir pipeline: memetakan probabilitas BERT (urutan sama dengan
+    plan["score_texts"]) kembali ke aspek dan sentimen global.
+    """
+    aspect_sentiment_store = {}
+
+    for (seg, found_aspects), pos_prob in zip(plan["segments"], probs):
+        for aspect_name, trigger_word in found_aspects:
+            if aspect_name not in aspect_sentiment_store:
+                aspect_sentiment_store[aspect_name] = []
+
+            aspect_sentiment_store[aspect_name].append(
+                {"prob": pos_prob, "trigger": trigger_word}
+            )
+    # Aggregasi Hasil Aspek (Average & Logic)
     final_aspects_output = {}
 
     if aspect_sentiment_store:
@@ -369,15 +1037,73 @@ def analyze_single_review_complete(ASPECT_KEYWORDS, text, models_tuple, lang="au
                 "score": score,
                 "trigger": trigger_str,
             }
-    print(f"final_aspects_output : {final_aspects_output}")
-    # 5. Global Sentiment Prediction (Text Utuh)
-    clean_global = clean_text_advanced(ASPECT_KEYWORDS, text, lang, use_stemming=True)
-    global_prob = get_bert_prob(clean_global, model, tokenizer, lang)
+    # Global Sentiment Prediction (Text Utuh, selalu di posisi terakhir)
+    global_prob = probs[-1]
 
     global_label = "Positive" if global_prob > 0.5 else "Negative"
     global_conf = global_prob if global_label == "Positive" else 1.0 - global_prob
 
-    return global_label, global_conf, final_aspects_output, lang
+    return global_label, global_conf, final_aspects_output, plan["lang"]
+
+
+def analyze_single_review_complete(
+    ASPECT_KEYWORDS, text, models_tuple, lang="auto", cache=None, server=None
+):
+    """
+    PIPELINE UTAMA ABSA END-TO-END
+    Menerima teks -> Cleaning -> Split Segmen -> Deteksi Aspek -> Scoring BERT.
+    `cache` (opsional) adalah cache hasil inference dari create_inference_cache().
+    `server` (opsional) adalah InferenceServer; scoring dikirim ke antriannya
+    (digabung dengan request sesi lain) alih-alih memanggil model langsung.
+    """
+    # 1. Identifikasi Bahasa & Model
+    if not models_ready(models_tuple):
+        return "Error", 0.0, {}, "en"
+
+    if lang == "auto":
+        lang = detect_language(text)
+
+    # 2. Preprocessing, Segmentasi & Deteksi Aspek
+    plan = prepare_review(ASPECT_KEYWORDS, text, lang)
+
+    # 3. Semua segmen + teks global di-score dalam satu forward pass
+    if server is not None:
+        probs = server.score(plan["score_texts"], lang)
+    else:
+        # Load pasangan model & tokenizer yang tepat
+        model, tokenizer = select_model(models_tuple, lang)
+        probs = get_bert_probs(
+            plan["score_texts"], model, tokenizer, lang, cache=cache
+        )
+
+    # 4. Aggregasi aspek & sentimen global
+    return aggregate_review(plan, probs)
+
+
+# Single-flight di depan analyze_single_review_complete: request serentak untuk
+# teks yang sama berbagi satu komputasi; hasil disimpan sebentar (TTL)
+review_flight = SingleFlight(
+    TTLCache(setting.REVIEW_RESULT_CACHE_SIZE, setting.REVIEW_RESULT_TTL)
+)
+
+
+def analyze_review_coalesced(
+    ASPECT_KEYWORDS, text, models_tuple, lang="auto", cache=None, server=None
+):
+    """
+    Sama seperti analyze_single_review_complete, tetapi request dengan
+    (teks, bahasa, versi kamus aspek) yang sama digabung (single-flight) dan
+    hasilnya di-cache selama setting.REVIEW_RESULT_TTL detik.
+    Output tidak berubah; setiap pemanggil mendapat salinan hasilnya sendiri.
+    """
+    key = (text, lang, keywords_version(ASPECT_KEYWORDS))
+    result = review_flight.do(
+        key,
+        lambda: analyze_single_review_complete(
+            ASPECT_KEYWORDS, text, models_tuple, lang, cache=cache, server=server
+        ),
+    )
+    return copy.deepcopy(result)
 
 
 # ==========================================
@@ -386,9 +1112,12 @@ def analyze_single_review_complete(ASPECT_KEYWORDS, text, models_tuple, lang="au
 
 
 def load_uploaded_file(uploaded_file):
-    """Membaca file CSV/Excel ke DataFrame"""
+    """Membaca file CSV/Excel ke DataFrame (file upload Streamlit atau path)"""
+    import pandas as pd
+
     try:
-        if uploaded_file.name.endswith(".csv"):
+        name = getattr(uploaded_file, "name", uploaded_file)
+        if str(name).endswith(".csv"):
             df = pd.read_csv(uploaded_file)
         else:
             df = pd.read_excel(uploaded_file)
@@ -420,6 +1149,101 @@ def find_text_column(df):
     return None
 
 
+def _rewind(source):
+    """Kembalikan posisi baca file upload ke awal (path string tidak perlu)."""
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+class _ExcelRows:
+    """Iterator baris (values) sheet aktif; workbook ditutup saat selesai."""
+
+    def __init__(self, source):
+        import openpyxl
+
+        self.workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+    def __enter__(self):
+        return self.workbook.active.iter_rows(values_only=True)
+
+    def __exit__(self, *exc):
+        self.workbook.close()
+
+
+class TextColumnReader:
+    """
+    Membaca kolom teks dari file CSV/Excel secara bertahap (streaming).
+    Hanya kolom teks yang dimaterialisasi; iterasi menghasilkan list teks
+    berisi maksimal `chunk_rows` baris, sehingga memori tetap datar untuk
+    file jutaan baris. Excel dibaca dengan openpyxl mode read-only.
+    """
+
+    SAMPLE_ROWS = 100
+
+    def __init__(self, source, chunk_rows=None):
+        self.source = source
+        self.chunk_rows = chunk_rows or setting.STREAM_CHUNK_ROWS
+        self.is_csv = str(getattr(source, "name", source)).endswith(".csv")
+        # Kolom teks dicari dari sampel kecil (find_text_column butuh dtype)
+        self.text_col = find_text_column(self._read_sample())
+
+    def _read_sample(self):
+        import pandas as pd
+
+        _rewind(self.source)
+        if self.is_csv:
+            return pd.read_csv(self.source, nrows=self.SAMPLE_ROWS)
+        with self._open_sheet() as rows:
+            header = [str(col) for col in next(rows, ())]
+            sample = [row for _, row in zip(range(self.SAMPLE_ROWS), rows)]
+        return pd.DataFrame(sample, columns=header)
+
+    def _open_sheet(self):
+        _rewind(self.source)
+        return _ExcelRows(self.source)
+
+    def _iter_csv_chunks(self):
+        import pandas as pd
+
+        _rewind(self.source)
+        for chunk in pd.read_csv(
+            self.source, usecols=[self.text_col], chunksize=self.chunk_rows
+        ):
+            yield chunk[self.text_col].tolist()
+
+    def _iter_excel_chunks(self):
+        with self._open_sheet() as rows:
+            header = [str(col) for col in next(rows, ())]
+            col_idx = header.index(self.text_col)
+            chunk = []
+            for row in rows:
+                value = row[col_idx] if col_idx < len(row) else None
+                # Sel kosong -> NaN, sama seperti pd.read_excel
+                chunk.append(float("nan") if value is None else value)
+                if len(chunk) == self.chunk_rows:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def __iter__(self):
+        if self.is_csv:
+            return self._iter_csv_chunks()
+        return self._iter_excel_chunks()
+
+    def count_rows(self):
+        """Jumlah baris data (satu kali baca cepat, hanya kolom teks)."""
+        return sum(len(chunk) for chunk in self)
+
+
+def open_text_column(uploaded_file, chunk_rows=None):
+    """Membuka file CSV/Excel untuk dibaca bertahap (None jika gagal dibaca)"""
+    try:
+        return TextColumnReader(uploaded_file, chunk_rows)
+    except Exception as e:
+        return None
+
+
 def convert_df_to_csv(df):
     """Mengubah DF ke CSV string untuk download button"""
     return df.to_csv(index=False).encode("utf-8")
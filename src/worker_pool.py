@@ -0,0 +1,192 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+
+import batch_engine
+import setting
+import utils
+
+
+# ==========================================
+# MULTI-PROCESS WORKER POOL (OPT-IN)
+# ==========================================
+# Satu proses Python = satu GIL: preprocessing (regex, slang, Sastrawi) dan
+# kode Python di sekitar forward pass tidak bisa memakai semua core. Mode ini
+# membagi chunk review ke beberapa proses worker.
+# - CLI (proses induk single-thread) + Linux + CPU: model dimuat sekali di
+#   proses induk lalu di-fork, sehingga bobot (read-only) dipakai bersama lewat
+#   copy-on-write, tidak disalin.
+# - Selain itu (server Streamlit yang multi-thread / CUDA / ONNX Runtime):
+#   worker di-spawn dan memuat modelnya sendiri. Fork dari proses multi-thread
+#   tidak aman (lock & thread pool OpenMP torch ikut tersalin setengah jalan).
+# Thread intra-op per worker = jumlah core / jumlah worker (tidak oversubscribe).
+# Aktifkan dengan setting.BATCH_PROCESSES atau `python -m absa batch --workers N`.
+
+# State per proses worker (diisi oleh _init_worker)
+_worker = {}
+
+
+def threads_per_worker(processes):
+    """Thread intra-op per worker agar total thread = jumlah core."""
+    return max(1, (os.cpu_count() or 1) // processes)
+
+
+def can_share_models(allow_fork=False):
+    """
+    Fork (copy-on-write) hanya aman untuk model PyTorch di CPU, dan hanya jika
+    pemanggil menjamin prosesnya single-thread (`allow_fork`, mis. CLI).
+    """
+    if not allow_fork or "fork" not in multiprocessing.get_all_start_methods():
+        return False
+    if setting.INFERENCE_BACKEND != "torch":
+        return False
+    return utils.resolve_device().type == "cpu"
+
+
+def _init_worker(ASPECT_KEYWORDS, lang, threads, models_tuple):
+    setting.TORCH_NUM_THREADS = threads
+    setting.ONNX_NUM_THREADS = threads
+
+    if models_tuple is None:
+        # Tidak berbagi dengan induk: muat model sendiri di worker ini. Checksum
+        # bundle sudah dicek induk saat startup, tidak perlu di-hash ulang
+        utils.load_all_models.cache_clear()
+        models_tuple = utils.load_all_models(verify_hashes=False)
+    elif isinstance(models_tuple, utils.LazyModelStore):
+        # Lock hasil fork bisa saja tersalin dalam keadaan terkunci
+        models_tuple.lock = threading.RLock()
+        models_tuple.reaper = None
+    # Cache stemming induk tidak dipakai: lock-nya bisa tersalin dalam keadaan
+    # terkunci (thread sesi lain), dan koneksi SQLite tidak boleh lintas fork()
+    utils.stem_cache = utils.create_stem_cache()
+    utils.configure_torch_threads()
+
+    _worker.update(
+        keywords=ASPECT_KEYWORDS,
+        lang=lang,
+        models=models_tuple,
+        cache=utils.create_inference_cache(),
+    )
+
+
+def _analyze_chunk(chunk):
+    """
+    Dijalankan di worker: output (DataFrame hasil, lang_progress, stats padding,
+    statistik dedup).
+    """
+    final = {}
+    stats = []
+    dedup = {}
+
+    def report(done, total, lang_progress):
+        final.update(lang_progress)
+
+    df_chunk = batch_engine.analyze_batch(
+        _worker["keywords"],
+        chunk,
+        _worker["models"],
+        _worker["lang"],
+        progress_callback=report,
+        stats=stats,
+        cache=_worker["cache"],
+        dedup=dedup,
+    )
+    return df_chunk, final, stats, dedup
+
+
+class AnalysisPool:
+    """
+    Pool proses untuk menganalisis chunk review secara paralel.
+    `imap(chunks)` menghasilkan (DataFrame, lang_progress, stats, dedup) per chunk
+    dengan urutan yang sama seperti input; jumlah chunk yang sedang dikerjakan
+    dibatasi (2 per worker) agar memori tidak ikut membesar.
+    """
+
+    def __init__(
+        self,
+        ASPECT_KEYWORDS,
+        models_tuple,
+        lang="auto",
+        processes=None,
+        allow_fork=False,
+    ):
+        self.processes = processes or setting.BATCH_PROCESSES
+        self.shared = can_share_models(allow_fork)
+        if self.shared:
+            # Muat model di induk sebelum fork agar bobotnya dipakai bersama
+            langs = list(setting.MODEL_PATHS) if lang == "auto" else [lang]
+            for model_lang in langs:
+                utils.select_model(models_tuple, model_lang)
+            context = multiprocessing.get_context("fork")
+        else:
+            models_tuple = None
+            context = multiprocessing.get_context("spawn")
+
+        self.pool = context.Pool(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(
+                ASPECT_KEYWORDS,
+                lang,
+                threads_per_worker(self.processes),
+                models_tuple,
+            ),
+        )
+
+    def imap(self, chunks):
+        pending = deque()
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            pending.append(self.pool.apply_async(_analyze_chunk, (list(chunk),)))
+            if len(pending) >= 2 * self.processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_pool_results(
+    ASPECT_KEYWORDS,
+    chunks,
+    models_tuple,
+    lang="auto",
+    processes=None,
+    total=None,
+    progress_callback=None,
+    stats=None,
+    dedup=None,
+    allow_fork=False,
+):
+    """
+    Versi multi-proses dari batch_engine.iter_stream_results: yield DataFrame
+    hasil per chunk (urutan asli), progres per bahasa digabung di proses induk.
+    `allow_fork=True` hanya untuk pemanggil single-thread (CLI); dari server
+    Streamlit worker selalu di-spawn.
+    """
+    base = {}
+    done = 0
+    with AnalysisPool(
+        ASPECT_KEYWORDS, models_tuple, lang, processes, allow_fork
+    ) as pool:
+        for df_chunk, lang_progress, chunk_stats, chunk_dedup in pool.imap(chunks):
+            base = batch_engine.merge_lang_progress(base, lang_progress)
+            done += len(df_chunk)
+            if stats is not None:
+                stats.extend(chunk_stats)
+            if dedup is not None:
+                for key, count in chunk_dedup.items():
+                    dedup[key] = dedup.get(key, 0) + count
+            if progress_callback:
+                progress_callback(done, total, base)
+            yield df_chunk
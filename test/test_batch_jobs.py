@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+import batch_engine
+import batch_jobs
+import setting
+
+
+@pytest.fixture
+def job_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(setting, "BATCH_JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(setting, "BATCH_PROCESSES", None)
+    path = tmp_path / "ulasan.csv"
+    texts = [f"ulasan nomor {i}" for i in range(7)]
+    pd.DataFrame({"content": texts}).to_csv(path, index=False)
+    return str(path), texts
+
+
+def fake_analyze_batch(calls, fail_on=None):
+    def analyze(ASPECT_KEYWORDS, texts, models_tuple, lang="auto", **kwargs):
+        texts = list(texts)
+        if fail_on in texts:
+            raise RuntimeError("model error")
+        calls.append(texts)
+        return pd.DataFrame({"Original Text": texts, "Language": ["id"] * len(texts)})
+
+    return analyze
+
+
+def run_job(path):
+    job_id = batch_jobs.create_job(path, "id", setting.ASPECT_KEYWORDS, chunk_rows=3)
+    job = batch_jobs.get_job(job_id)
+    batch_jobs.start_job(job_id, None).join(10)
+    return job
+
+
+def test_job_status_reaches_failed_then_resumes_to_done(job_env, monkeypatch):
+    path, texts = job_env
+
+    calls = []
+    monkeypatch.setattr(
+        batch_engine, "analyze_batch", fake_analyze_batch(calls, fail_on=texts[4])
+    )
+    # Objek job dibuat sebelum runner selesai (seperti halaman Batch)
+    job = run_job(path)
+    assert job.status() == "failed"
+    assert job.meta["error"] == "model error"
+    assert job.progress()["done"] == 3
+
+    calls = []
+    monkeypatch.setattr(batch_engine, "analyze_batch", fake_analyze_batch(calls))
+    job = run_job(path)
+    assert job.status() == "done"
+    # Chunk pertama diambil dari checkpoint, tidak dianalisis ulang
+    assert calls == [texts[3:6], texts[6:]]
+    assert job.result()["Original Text"].tolist() == texts
+
+
+def test_expired_jobs_are_purged_and_listed_per_owner(job_env, monkeypatch):
+    path, texts = job_env
+    monkeypatch.setattr(batch_engine, "analyze_batch", fake_analyze_batch([]))
+    job_id = batch_jobs.create_job(path, "id", setting.ASPECT_KEYWORDS, owner="a")
+    batch_jobs.start_job(job_id, None).join(10)
+
+    assert [job.job_id for job in batch_jobs.list_jobs(owner="a")] == [job_id]
+    assert batch_jobs.list_jobs(owner="b") == []
+    # Upload ulang file yang sama dari sesi lain: job berpindah pemilik
+    batch_jobs.create_job(path, "id", setting.ASPECT_KEYWORDS, owner="b")
+    assert [job.job_id for job in batch_jobs.list_jobs(owner="b")] == [job_id]
+
+    updated = batch_jobs.get_job(job_id).meta["updated"]
+    ttl = setting.BATCH_JOB_TTL_HOURS * 3600
+    assert batch_jobs.purge_expired_jobs(now=updated + ttl - 1) == []
+    assert batch_jobs.purge_expired_jobs(now=updated + ttl + 1) == [job_id]
+    assert batch_jobs.get_job(job_id) is None
@@ -0,0 +1,45 @@
+import threading
+import time
+
+from cache_store import SingleFlight, TTLCache
+
+
+def test_single_flight_shares_one_computation():
+    flight = SingleFlight(TTLCache(100, ttl=60))
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ("Positive", 0.9)
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+        for _ in range(5)
+    ]
+    for t in followers:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert calls == [1]
+    assert results == [("Positive", 0.9)] * 6
+    assert flight.do("k", compute) == ("Positive", 0.9)
+    assert len(calls) == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(10, ttl=0.01)
+    cache.set("k", 1)
+    assert cache.get("k") == 1
+    time.sleep(0.02)
+    assert cache.get("k") is None
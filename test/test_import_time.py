@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+# Batas waktu `import utils` (detik). Framework berat harus di-import lazy,
+# dan utils tidak boleh bergantung ke Streamlit (dipakai juga oleh CLI).
+IMPORT_BUDGET_SECONDS = 2.0
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "tensorflow",
+    "nltk",
+    "Sastrawi",
+    "langdetect",
+    "streamlit",
+]
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+
+def test_import_utils_within_budget():
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import utils\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    # Proses baru agar tidak terpengaruh modul yang sudah di-import test lain
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+
+    assert loaded == ""
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+import inference_server
+import utils
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Model palsu: panggilan pertama ditahan sampai `gate` dibuka."""
+    calls = []
+    started = threading.Event()
+    gate = threading.Event()
+
+    def get_bert_probs(texts, model, tokenizer, lang, **kwargs):
+        calls.append(list(texts))
+        started.set()
+        gate.wait(5)
+        return np.full(len(texts), 0.5, dtype=np.float32)
+
+    monkeypatch.setattr(utils, "select_model", lambda models_tuple, lang: (lang, None))
+    monkeypatch.setattr(utils, "get_bert_probs", get_bert_probs)
+    return calls, started, gate
+
+
+def test_interactive_request_preempts_queued_batch_work(fake_model):
+    calls, started, gate = fake_model
+    server = inference_server.InferenceServer(None, max_wait_ms=1)
+    try:
+        job = server.submit([f"job {i}" for i in range(300)], "id", "batch", "job")
+        started.wait(5)
+        single = server.submit(["ulasan"], "id", "interactive", "sesi")
+        gate.set()
+        single.result(5)
+        # Tepat setelah micro-batch yang sedang jalan, sebelum sisa job
+        assert calls[1] == ["ulasan"]
+        assert len(job.result(5)) == 300
+    finally:
+        gate.set()
+        server.close()
+
+
+def test_second_job_shares_micro_batches_with_first(fake_model):
+    calls, started, gate = fake_model
+    server = inference_server.InferenceServer(None, max_wait_ms=1)
+    try:
+        job1 = server.submit([f"a {i}" for i in range(2000)], "id", "batch", "job1")
+        started.wait(5)
+        job2 = server.submit([f"b {i}" for i in range(10)], "id", "batch", "job2")
+        gate.set()
+        job2.result(5)
+        # Job kedua ikut micro-batch berikutnya, tidak menunggu job pertama habis
+        assert any(text.startswith("b ") for text in calls[1])
+        assert all(len(batch) <= server.max_batch_texts for batch in calls)
+        assert len(job1.result(5)) == 2000
+    finally:
+        gate.set()
+        server.close()
+
+
+def test_model_failure_is_reported_and_dispatcher_survives(monkeypatch):
+    def get_bert_probs(texts, model, tokenizer, lang, **kwargs):
+        if lang == "en":
+            return None
+        return np.full(len(texts), 0.5, dtype=np.float32)
+
+    monkeypatch.setattr(utils, "select_model", lambda models_tuple, lang: (lang, None))
+    monkeypatch.setattr(utils, "get_bert_probs", get_bert_probs)
+    server = inference_server.InferenceServer(None, max_wait_ms=1)
+    try:
+        with pytest.raises(ValueError):
+            server.submit(["bonjour"], "fr")
+        with pytest.raises(RuntimeError):
+            server.submit(["good app"], "en").result(5)
+        assert server.dispatcher.is_alive()
+        assert len(server.submit(["aplikasi bagus"], "id").result(5)) == 1
+    finally:
+        server.close()
@@ -1,4 +1,6 @@
+import copy
 import pytest
+import utils
 from utils import clean_text_advanced
 import setting
 
@@ -36,3 +38,77 @@ def test_clean_text_advanced():
         )
         == "i dont like the musik but the ui is bagus"
     )
+
+
+def test_clean_text_advanced_urls_numbers_and_repeats():
+    cases = [
+        (
+            "Premiumnya MAHAL bangeeet!!! cek http://spotify.com @spotify #music 2024",
+            "id",
+            "premium mahal bangeet cek",
+        ),
+        (
+            "Premiumnya MAHAL bangeeet!!! cek http://spotify.com @spotify #music 2024",
+            "en",
+            "premium mahal bangeet ! ! ! cek",
+        ),
+        (
+            "Sooo goooood!!! check https://spotify.com @spotify #music 2024 mp3 4g",
+            "en",
+            "soo good ! ! ! check mp3 4g",
+        ),
+    ]
+    for text, lang, expected in cases:
+        assert (
+            clean_text_advanced(
+                ASPECT_KEYWORDS=setting.ASPECT_KEYWORDS, text=text, lang=lang
+            )
+            == expected
+        )
+    # Preprocessor dibangun sekali per versi kamus & bahasa
+    preprocessor = utils.get_preprocessor(setting.ASPECT_KEYWORDS, "id")
+    assert preprocessor is utils.get_preprocessor(setting.ASPECT_KEYWORDS, "id")
+
+
+def test_prefix_trie_matches_linear_scan():
+    keywords = utils.build_keyword_set(setting.ASPECT_KEYWORDS, "id").union(
+        utils.build_keyword_set(setting.ASPECT_KEYWORDS, "en")
+    )
+    trie = utils.PrefixTrie(keywords)
+    tokens = ["aplikasinya", "uinya", "lagunya", "musik", "iklannya", "xyz", "a"]
+    tokens += [kw + "nya" for kw in keywords] + [kw[:-1] for kw in keywords]
+    for token in tokens:
+        assert utils.normalize_by_prefix(token, trie) == utils.normalize_by_prefix(
+            token, keywords
+        )
+
+
+def test_aspect_matcher_rebuilds_after_keyword_edit():
+    aspect_keywords = copy.deepcopy(setting.ASPECT_KEYWORDS)
+    segment = "lagu bagus tapi iklan mengganggu banget"
+    before = utils.get_smart_aspects(aspect_keywords, segment, "id")
+    aspect_keywords["id"]["Kategori Baru"] = ["mengganggu"]
+    after = utils.get_smart_aspects(aspect_keywords, segment, "id")
+    assert after == before + [("Kategori Baru", "mengganggu")]
+
+
+def test_detect_languages_uses_vocab_for_clear_reviews():
+    stats = {}
+    texts = [
+        "aplikasinya bagus tapi iklannya terlalu banyak",
+        "the app is great but there are too many ads",
+        "aplikasinya bagus tapi iklannya terlalu banyak",
+    ]
+    assert utils.detect_languages(texts, stats=stats) == ["id", "en", "id"]
+    assert stats == {"vocab": 2}
+
+
+def test_detect_languages_english_praise_is_not_indonesian():
+    # Kata seperti "good", "love", "songs" ada di SLANG_MAP / kamus aspek ID
+    texts = [
+        "Best app ever. Good songs, love it!",
+        "good good, thanks",
+        "ok good, love it",
+    ]
+    assert utils.detect_languages(texts) == ["en", "en", "en"]
+    assert [utils.detect_language(text) for text in texts] == ["en", "en", "en"]
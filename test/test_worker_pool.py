@@ -0,0 +1,56 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch_engine
+import setting
+import utils
+import worker_pool
+
+
+def fake_bert_probs(texts, model, tokenizer, lang, batch_size=None, **kwargs):
+    # Deterministik lintas proses (tidak memakai hash())
+    return np.array([(len(t) % 7) / 7 for t in texts], dtype=np.float32)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="butuh fork"
+)
+def test_pool_matches_single_process(monkeypatch):
+    # Model palsu: fork diwarisi worker, tanpa torch/bobot model
+    monkeypatch.setattr(setting, "INFERENCE_BACKEND", "torch")
+    monkeypatch.setattr(utils, "resolve_device", lambda: type("D", (), {"type": "cpu"}))
+    monkeypatch.setattr(utils, "configure_torch_threads", lambda: None)
+    monkeypatch.setattr(utils, "models_ready", lambda models_tuple: True)
+    monkeypatch.setattr(utils, "select_model", lambda models_tuple, lang: (lang, None))
+    monkeypatch.setattr(utils, "get_bert_probs", fake_bert_probs)
+
+    texts = [
+        "aplikasinya bagus tapi iklannya terlalu banyak",
+        "the app is great but there are too many ads",
+        "lagunya lengkap, sayangnya harga premium mahal banget",
+        "keeps crashing when i open my playlist",
+        "gak bisa login dari kemarin",
+    ] * 4
+    chunks = [texts[i : i + 6] for i in range(0, len(texts), 6)]
+    models_tuple = object()
+
+    single = pd.concat(
+        batch_engine.iter_stream_results(
+            setting.ASPECT_KEYWORDS, iter(chunks), models_tuple
+        ),
+        ignore_index=True,
+    )
+    pooled = pd.concat(
+        worker_pool.iter_pool_results(
+            setting.ASPECT_KEYWORDS,
+            iter(chunks),
+            models_tuple,
+            processes=2,
+            allow_fork=True,
+        ),
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(pooled, single)